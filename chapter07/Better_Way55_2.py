@@ -0,0 +1,363 @@
+# 병목 단계에 작업자를 더 붙이도록 파이프라인이 스스로 규모를 조정하게 하라
+
+# Better_Way55의 start_threads는 단계마다 작업자 수(다운로드 3, 크기 변경 4, 업로드 5)를 시작할 때 정해 버린다
+# 실제 부하에서는 한 단계가 병목이 되어 그 입력 큐만 계속 길어지고, 다른 단계의 작업자는 놀게 된다
+
+# PipelineSupervisor는 일정한 간격으로 단계마다 입력 큐의 길이와 원소 하나를 처리하는 데 걸린 시간(서비스 시간)을 본다
+# - 큐에 쌓인 원소를 지금 작업자 수로 처리하는 데 target_delay보다 오래 걸리면 작업자를 추가한다
+# - 큐가 비어 있고 작업자들이 대부분 놀고 있으면 작업자를 하나씩 내보낸다
+# 작업자를 내보낼 때는 stop_threads와 같은 방법으로, 내보낼 작업자 하나당 센티넬을 하나씩 큐에 넣는다
+# 센티넬을 꺼낸 작업자는 하던 일을 모두 마친 상태로 루프를 빠져나오므로 처리 중이던 원소를 잃어버리지 않는다
+# func에서 예외가 나서 끝난 작업자는 센티넬을 꺼내지 않았으므로 실패로 기록하고 새 작업자로 바꾼다
+
+from collections import namedtuple
+from queue import Queue
+from threading import Event
+from threading import Lock
+from threading import Thread
+import math
+import time
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+
+def start_threads(count, *args):
+    threads = [StoppableWorker(*args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def stop_threads(closable_queue, threads):
+    for _ in threads:
+        closable_queue.close()
+
+    closable_queue.join()
+
+    for thread in threads:
+        thread.join()
+
+# func를 실행하는 데 걸린 시간을 단계에 보고하는 작업자
+# 센티넬을 받아서 루프가 끝나면 물러난 것으로, func에서 예외가 나면 실패한 것으로 단계에 알린다
+class MeasuredWorker(StoppableWorker):
+    def __init__(self, stage):
+        super().__init__(stage.func, stage.in_queue, stage.out_queue)
+        self.stage = stage
+
+    def run(self):
+        try:
+            for item in self.in_queue:
+                start = time.perf_counter()
+                result = self.func(item)
+                self.stage.record(time.perf_counter() - start)
+                self.out_queue.put(result)
+        except Exception as e:
+            self.stage.worker_failed(self, e)
+        else:
+            self.stage.worker_retired(self)
+
+StageAllocation = namedtuple(
+    'StageAllocation',
+    'workers retiring depth service_time utilization items')
+
+class Stage:
+    def __init__(self, name, func, in_queue, out_queue,
+                 min_workers=1, max_workers=16):
+        self.name = name
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.lock = Lock()
+        self.workers = []
+        self.retiring = 0      # 센티넬을 넣었지만 아직 끝나지 않은 작업자 수
+        self.failures = []     # func에서 난 예외 목록
+        self.items = 0
+        self.busy_time = 0.0
+        # 직전 rebalance 시점의 값. 구간별 서비스 시간과 이용률을 계산할 때 쓴다
+        self.last_items = 0
+        self.last_busy_time = 0.0
+        self.last_time = time.perf_counter()
+        self.service_time = 0.0
+        self.utilization = 0.0
+
+    def start(self, count=None):
+        for _ in range(count or self.min_workers):
+            self.add_worker()
+
+    def record(self, elapsed):
+        with self.lock:
+            self.items += 1
+            self.busy_time += elapsed
+
+    # 센티넬을 꺼내고 끝난 작업자만 retiring에서 뺀다
+    def worker_retired(self, worker):
+        with self.lock:
+            self.workers.remove(worker)
+            self.retiring -= 1
+
+    # 예외로 끝난 작업자는 센티넬을 꺼내지 않았으므로 retiring은 그대로 두고 새 작업자로 바꾼다
+    # 그래야 이미 넣어 둔 센티넬을 꺼낼 작업자 수가 맞고 stop이 끝없이 기다리지 않는다
+    def worker_failed(self, worker, error):
+        with self.lock:
+            self.workers.remove(worker)
+            self.failures.append(error)
+        self.add_worker()
+
+    @property
+    def active(self):
+        return len(self.workers) - self.retiring
+
+    def add_worker(self):
+        worker = MeasuredWorker(self)
+        with self.lock:
+            self.workers.append(worker)
+        worker.start()
+
+    def retire_worker(self):
+        with self.lock:
+            self.retiring += 1
+        self.in_queue.close()
+
+    # 지금 작업자 수로 큐를 비우는 데 걸릴 시간이 target_delay를 넘으면 필요한 만큼 작업자를 늘리고,
+    # 큐가 비어 있으면서 이용률이 idle_utilization보다 낮으면 작업자를 하나 줄인다
+    # 바뀐 작업자 수를 돌려준다(바뀌지 않았으면 None)
+    def rebalance(self, target_delay, idle_utilization):
+        now = time.perf_counter()
+        with self.lock:
+            items = self.items - self.last_items
+            busy_time = self.busy_time - self.last_busy_time
+            self.last_items = self.items
+            self.last_busy_time = self.busy_time
+            active = self.active
+        elapsed = now - self.last_time
+        self.last_time = now
+
+        if items:
+            self.service_time = busy_time / items
+        self.utilization = busy_time / (elapsed * max(active, 1))
+        depth = self.in_queue.qsize()
+
+        desired = active
+        if depth and self.service_time:
+            backlog_time = depth * self.service_time
+            desired = max(active, math.ceil(backlog_time / target_delay))
+        elif depth == 0 and self.utilization < idle_utilization:
+            desired = active - 1
+        desired = min(max(desired, self.min_workers), self.max_workers)
+
+        if desired > active:
+            for _ in range(desired - active):
+                self.add_worker()
+        elif desired < active:
+            for _ in range(active - desired):
+                self.retire_worker()
+        else:
+            return None
+        return desired
+
+    def allocation(self):
+        with self.lock:
+            return StageAllocation(
+                workers=self.active,
+                retiring=self.retiring,
+                depth=self.in_queue.qsize(),
+                service_time=self.service_time,
+                utilization=self.utilization,
+                items=self.items)
+
+    # stop_threads와 같다. 남아 있는 작업자 수만큼 센티넬을 넣고 모두 끝날 때까지 기다린다
+    def stop(self):
+        with self.lock:
+            remaining = self.active
+            workers = list(self.workers)
+            self.retiring += remaining
+        for _ in range(remaining):
+            self.in_queue.close()
+        self.in_queue.join()
+        # 도중에 실패한 작업자를 대신한 작업자도 기다린다
+        while workers:
+            for worker in workers:
+                worker.join()
+            with self.lock:
+                workers = list(self.workers)
+
+class PipelineSupervisor(Thread):
+    def __init__(self, stages, interval=0.05, target_delay=0.1,
+                 idle_utilization=0.3):
+        super().__init__(daemon=True)
+        self.stages = stages
+        self.interval = interval
+        self.target_delay = target_delay
+        self.idle_utilization = idle_utilization
+        self.stopped = Event()
+        self.events = []       # (시각, 단계 이름, 바뀐 작업자 수)
+        self.started_at = time.perf_counter()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for stage in self.stages:
+                workers = stage.rebalance(
+                    self.target_delay, self.idle_utilization)
+                if workers is not None:
+                    at = time.perf_counter() - self.started_at
+                    self.events.append((at, stage.name, workers))
+
+    # 단계 이름별로 현재 작업자 수, 큐 길이, 서비스 시간, 이용률을 돌려준다
+    def allocation(self):
+        return {stage.name: stage.allocation() for stage in self.stages}
+
+    # 감독을 멈춘 뒤 앞 단계부터 차례로 작업자를 모두 종료한다
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        for stage in self.stages:
+            stage.stop()
+
+# 크기 변경 단계가 다른 단계보다 다섯 배 느린 파이프라인
+def download(item):
+    time.sleep(0.001)
+    return item
+
+def resize(item):
+    time.sleep(0.005)
+    return item
+
+def upload(item):
+    time.sleep(0.001)
+    return item
+
+def format_allocation(allocation):
+    return ', '.join(
+        f'{name} {a.workers}개(큐 {a.depth})'
+        for name, a in allocation.items())
+
+def run_fixed(count):
+    download_queue = ClosableQueue()
+    resize_queue = ClosableQueue()
+    upload_queue = ClosableQueue()
+    done_queue = ClosableQueue()
+
+    start = time.perf_counter()
+    download_threads = start_threads(
+        3, download, download_queue, resize_queue)
+    resize_threads = start_threads(
+        4, resize, resize_queue, upload_queue)
+    upload_threads = start_threads(
+        5, upload, upload_queue, done_queue)
+
+    for _ in range(count):
+        download_queue.put(object())
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    elapsed = time.perf_counter() - start
+
+    assert done_queue.qsize() == count
+    print(f'고정 작업자(3, 4, 5개): {count}개 처리에 {elapsed:.2f}초')
+
+def run_supervised(count):
+    download_queue = ClosableQueue()
+    resize_queue = ClosableQueue()
+    upload_queue = ClosableQueue()
+    done_queue = ClosableQueue()
+    stages = [
+        Stage('download', download, download_queue, resize_queue),
+        Stage('resize', resize, resize_queue, upload_queue),
+        Stage('upload', upload, upload_queue, done_queue),
+    ]
+
+    start = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    supervisor = PipelineSupervisor(stages)
+    supervisor.start()
+
+    for _ in range(count):
+        download_queue.put(object())
+
+    while done_queue.qsize() < count:
+        time.sleep(0.2)
+        print(f'  {time.perf_counter() - start:.1f}초: '
+              f'{format_allocation(supervisor.allocation())}')
+    elapsed = time.perf_counter() - start
+
+    # 일이 없으면 작업자가 최솟값까지 줄어든다
+    time.sleep(1)
+    print(f'  대기 1초 후: {format_allocation(supervisor.allocation())}')
+
+    supervisor.stop()
+    assert done_queue.qsize() == count
+    assert all(not stage.workers for stage in stages)
+    print(f'자동 조정: {count}개 처리에 {elapsed:.2f}초, '
+          f'조정 {len(supervisor.events)}번')
+
+# 작업자가 예외로 끝나도 센티넬 수와 작업자 수가 어긋나지 않아야 stop이 끝난다
+def fail_on_odd(item):
+    if item % 2:
+        raise ValueError(f'홀수: {item}')
+    return item
+
+def run_with_failures(count):
+    in_queue = ClosableQueue()
+    out_queue = ClosableQueue()
+    stage = Stage('flaky', fail_on_odd, in_queue, out_queue, min_workers=4)
+    stage.start()
+    for i in range(count):
+        in_queue.put(i)
+    stage.retire_worker()
+    stage.stop()
+    assert not stage.workers and stage.retiring == 0
+    assert out_queue.qsize() + len(stage.failures) == count
+    print(f'실패한 원소 {len(stage.failures)}개, 처리한 원소 {out_queue.qsize()}개')
+
+def main():
+    run_with_failures(100)
+    run_fixed(2000)
+    run_supervised(2000)
+
+if __name__ == '__main__':
+    main()
+
+# 실패한 원소 50개, 처리한 원소 50개
+# 고정 작업자(3, 4, 5개): 2000개 처리에 2.61초
+#   0.2초: download 16개(큐 0), resize 16개(큐 1651), upload 2개(큐 168)
+#   0.4초: download 13개(큐 0), resize 16개(큐 1014), upload 4개(큐 277)
+#   0.6초: download 9개(큐 0), resize 16개(큐 395), upload 4개(큐 183)
+#   0.8초: download 5개(큐 0), resize 16개(큐 0), upload 4개(큐 0)
+#   대기 1초 후: download 1개(큐 0), resize 1개(큐 0), upload 1개(큐 0)
+# 자동 조정: 2000개 처리에 0.81초, 조정 39번
+
+# 처음에는 모든 원소가 download 큐에 쌓이므로 download가 먼저 최댓값까지 늘어난다
+# 곧 download 큐가 비고 resize 큐가 길어지면 download 작업자는 하나씩 물러나고 resize 작업자가 최댓값을 유지한다
+# 고정 설정에서는 resize 작업자 4개가 전체 처리량을 결정하므로, 같은 일을 세 배 이상 오래 처리한다
+# 일이 끝나면 작업자가 min_workers까지 줄어들어 스레드를 쓸데없이 붙잡고 있지 않는다
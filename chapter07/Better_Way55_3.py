@@ -0,0 +1,261 @@
+# 값싼 단계가 많은 파이프라인에서는 큐 원소를 묶음으로 옮겨라
+
+# ClosableQueue와 StoppableWorker는 get()/put() 한 번에 원소 하나만 옮긴다
+# 호출할 때마다 큐의 뮤텍스를 얻고, Condition에 알리고, 나중에 task_done으로 다시 락을 잡는다
+# download/resize/upload처럼 하는 일이 거의 없는 단계에서는 이런 락 비용이 처리량을 결정해 버린다
+
+# put_many와 get_many는 락을 한 번만 잡고 여러 원소를 옮긴다
+# - put_many는 넣은 개수만큼 unfinished_tasks를 늘리고 대기 중인 소비자를 그만큼 깨운다
+# - get_many는 센티넬 앞에서 멈춘다. 센티넬은 작업자 하나를 종료시키는 표시이므로,
+#   여러 작업자가 센티넬을 하나씩 가져가도록 항상 센티넬만 따로 꺼낸다
+# - task_done_many(count)로 묶음 하나에 대한 task_done을 한 번에 처리하므로 join도 그대로 동작한다
+
+from queue import Empty
+from queue import Full
+from queue import Queue
+from threading import Thread
+import time
+
+def download(item):
+    return item
+
+def resize(item):
+    return item
+
+def upload(item):
+    return item
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+    # Queue.put과 같은 조건 변수를 사용한다
+    # timeout이 없으면 크기 제한이 있을 때 빈 자리만큼씩 나눠서 넣는다. 결국 전부 들어가므로 중간에 실패하지 않는다
+    # timeout이 있으면 묶음 전체가 들어갈 자리가 생길 때까지만 기다리고, 시간이 지나면 하나도 넣지 않고 Full을 던진다
+    # 일부만 들어간 채로 Full이 나면 호출자가 센티넬이나 task_done 개수를 맞출 수 없기 때문이다
+    def put_many(self, items, timeout=None):
+        items = list(items)
+        if timeout is not None:
+            if timeout < 0:
+                raise ValueError("'timeout' must be a non-negative number")
+            if self.maxsize > 0 and len(items) > self.maxsize:
+                raise ValueError("'items' must fit in the queue when 'timeout' is given")
+            with self.not_full:
+                if self.maxsize > 0 and not self.not_full.wait_for(
+                        lambda: self.maxsize - self._qsize() >= len(items), timeout):
+                    raise Full
+                self._put_items(items)
+            return
+
+        start = 0
+        while start < len(items):
+            with self.not_full:
+                if self.maxsize > 0:
+                    while self._qsize() >= self.maxsize:
+                        self.not_full.wait()
+                    end = min(len(items), start + self.maxsize - self._qsize())
+                else:
+                    end = len(items)
+                self._put_items(items[start:end])
+            start = end
+
+    # not_full의 락을 잡은 상태에서 호출해야 한다
+    def _put_items(self, items):
+        for item in items:
+            self._put(item)
+        self.unfinished_tasks += len(items)
+        self.not_empty.notify(len(items))
+
+    # 원소가 하나 이상 생길 때까지 기다렸다가 최대 max_items개를 꺼낸다
+    # 맨 앞이 센티넬이면 [SENTINEL] 하나만 돌려주고, 중간에 센티넬이 있으면 그 앞까지만 꺼낸다
+    def get_many(self, max_items, timeout=None):
+        if max_items < 1:
+            raise ValueError("'max_items' must be at least 1")
+        with self.not_empty:
+            if timeout is None:
+                while not self._qsize():
+                    self.not_empty.wait()
+            elif not self.not_empty.wait_for(self._qsize, timeout):
+                raise Empty
+
+            if self.queue[0] is self.SENTINEL:
+                items = [self._get()]
+            else:
+                items = []
+                while (len(items) < max_items and self._qsize() and
+                        self.queue[0] is not self.SENTINEL):
+                    items.append(self._get())
+            self.not_full.notify(len(items))
+            return items
+
+    def task_done_many(self, count):
+        with self.all_tasks_done:
+            unfinished = self.unfinished_tasks - count
+            if unfinished < 0:
+                raise ValueError('task_done() called too many times')
+            self.unfinished_tasks = unfinished
+            if unfinished == 0:
+                self.all_tasks_done.notify_all()
+
+    def iter_batches(self, max_items):
+        while True:
+            items = self.get_many(max_items)
+            try:
+                if items[0] is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield items
+            finally:
+                self.task_done_many(len(items))
+
+# batch_size를 지정하면 원소를 묶음으로 가져와서 func를 하나씩 적용하고 결과를 한꺼번에 넘긴다
+# func는 여전히 원소 하나를 받으므로 기존 단계 함수를 그대로 쓸 수 있다
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue, batch_size=None):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.batch_size = batch_size
+
+    def run(self):
+        if self.batch_size:
+            for items in self.in_queue.iter_batches(self.batch_size):
+                self.out_queue.put_many([self.func(item) for item in items])
+        else:
+            for item in self.in_queue:
+                result = self.func(item)
+                self.out_queue.put(result)
+
+
+def start_threads(count, *args, **kwargs):
+    threads = [StoppableWorker(*args, **kwargs) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def stop_threads(closable_queue, threads):
+    for _ in threads:
+        closable_queue.close()
+
+    closable_queue.join()
+
+    for thread in threads:
+        thread.join()
+
+# 센티넬 처리: 센티넬 앞의 원소만 꺼내고, 센티넬은 한 번에 하나씩만 꺼낸다
+work_queue = ClosableQueue()
+work_queue.put_many(range(5))
+work_queue.close()
+work_queue.close()
+print(work_queue.get_many(3))    # [0, 1, 2]
+print(work_queue.get_many(10))   # [3, 4]
+print(work_queue.get_many(10) == [ClosableQueue.SENTINEL])
+print(work_queue.get_many(10) == [ClosableQueue.SENTINEL])
+work_queue.task_done_many(7)
+work_queue.join()                # 모든 task_done이 처리되었으므로 바로 돌아온다
+
+try:
+    work_queue.get_many(10, timeout=0.01)
+except Empty:
+    print('예상대로 Empty 발생')
+
+# 크기 제한이 있는 큐에도 put_many가 빈 자리만큼씩 나눠서 넣는다
+bounded = ClosableQueue(3)
+consumer = StoppableWorker(download, bounded, work_queue, batch_size=2)
+consumer.start()
+bounded.put_many(range(10))
+bounded.close()
+consumer.join()
+print(sorted(work_queue.get_many(100)))
+work_queue.task_done_many(10)
+
+# timeout을 주면 묶음 전체가 들어가거나 하나도 들어가지 않는다
+bounded = ClosableQueue(3)
+bounded.put(1)
+try:
+    bounded.put_many([2, 3, 4], timeout=0.01)
+except Full:
+    print('예상대로 Full 발생, 큐 크기:', bounded.qsize())   # 1
+bounded.put_many([2, 3], timeout=0.01)
+print(bounded.get_many(10))                                  # [1, 2, 3]
+bounded.task_done_many(3)
+
+try:
+    bounded.get_many(0)
+except ValueError as e:
+    print('예상대로 ValueError 발생:', e)
+
+def run_pipeline(count, threads_per_stage, batch_size):
+    download_queue = ClosableQueue()
+    resize_queue = ClosableQueue()
+    upload_queue = ClosableQueue()
+    done_queue = ClosableQueue()
+
+    start = time.perf_counter()
+    download_threads = start_threads(
+        threads_per_stage[0], download, download_queue, resize_queue,
+        batch_size=batch_size)
+    resize_threads = start_threads(
+        threads_per_stage[1], resize, resize_queue, upload_queue,
+        batch_size=batch_size)
+    upload_threads = start_threads(
+        threads_per_stage[2], upload, upload_queue, done_queue,
+        batch_size=batch_size)
+
+    items = [object() for _ in range(count)]
+    if batch_size:
+        for i in range(0, count, batch_size):
+            download_queue.put_many(items[i:i + batch_size])
+    else:
+        for item in items:
+            download_queue.put(item)
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    elapsed = time.perf_counter() - start
+
+    assert done_queue.qsize() == count
+    return count / elapsed
+
+def benchmark(count, threads_per_stage):
+    baseline = run_pipeline(count, threads_per_stage, None)
+    print(f'작업자 {threads_per_stage}, 한 개씩: {baseline:,.0f}개/초')
+    for batch_size in (16, 64, 256):
+        rate = run_pipeline(count, threads_per_stage, batch_size)
+        print(f'작업자 {threads_per_stage}, {batch_size}개씩: '
+              f'{rate:,.0f}개/초 ({rate / baseline:.1f}배)')
+
+def main():
+    benchmark(100_000, (1, 1, 1))
+    benchmark(100_000, (3, 4, 5))
+
+if __name__ == '__main__':
+    main()
+
+# 작업자 (1, 1, 1), 한 개씩: 52,137개/초
+# 작업자 (1, 1, 1), 16개씩: 270,225개/초 (5.2배)
+# 작업자 (1, 1, 1), 64개씩: 447,013개/초 (8.6배)
+# 작업자 (1, 1, 1), 256개씩: 565,387개/초 (10.8배)
+# 작업자 (3, 4, 5), 한 개씩: 57,389개/초
+# 작업자 (3, 4, 5), 16개씩: 280,731개/초 (4.9배)
+# 작업자 (3, 4, 5), 64개씩: 392,495개/초 (6.8배)
+# 작업자 (3, 4, 5), 256개씩: 411,444개/초 (7.2배)
+
+# 단계 함수가 하는 일이 없으므로 한 개씩 옮길 때는 처리 시간 거의 전부가 락과 Condition 알림이다
+# 묶음 크기를 키울수록 이 비용이 원소 수로 나뉘어 처리량이 크게 늘어난다
+# 단, 묶음이 클수록 첫 원소가 다음 단계로 넘어가기까지 기다리는 시간도 길어진다
+# 단계 함수가 실제 I/O를 수행해서 원소 하나에 수 밀리초씩 걸린다면 묶음의 이점은 거의 사라진다
@@ -0,0 +1,350 @@
+# 파이프라인의 단계마다 어디서 시간을 쓰는지 계측하라
+
+# download -> resize -> upload 파이프라인이 느릴 때 StoppableWorker와 ClosableQueue만으로는 원인을 알 수 없다
+# 어떤 단계가 일을 하느라 바쁜지, 입력을 기다리며 노는지, 다음 단계 큐가 가득 차서 막혀 있는지 구분해야 한다
+
+# InstrumentedWorker는 단계마다 다음 값을 기록한다
+# - 처리한 원소 수, func 실행 시간
+# - get에서 입력을 기다린 시간, put에서 다음 큐에 자리가 나기를 기다린 시간
+# 원소는 파이프라인에 들어갈 때 시각을 찍은 Stamped로 감싸서 보내므로,
+# 각 단계가 끝난 시점까지의 누적 지연 시간을 히스토그램으로 모을 수 있다(마지막 단계의 값이 종단 간 지연 시간이다)
+# 큐 길이는 Reporter 스레드가 일정한 간격으로 표본을 뽑아 기록한다
+
+# 계측 비용을 줄이기 위해 작업자마다 자기 카운터를 따로 두고 락 없이 갱신한다
+# 스냅숏을 만들 때만 모든 작업자의 카운터를 더한다. 합계를 읽는 순간 진행 중인 원소가 있을 수 있으므로 근사값이다
+
+from collections import deque
+from collections import namedtuple
+from queue import Queue
+from threading import Event
+from threading import Thread
+import time
+
+def download(item):
+    return item
+
+def resize(item):
+    return item
+
+def upload(item):
+    return item
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+
+def start_threads(count, *args):
+    threads = [StoppableWorker(*args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def stop_threads(closable_queue, threads):
+    for _ in threads:
+        closable_queue.close()
+
+    closable_queue.join()
+
+    for thread in threads:
+        thread.join()
+
+class Stamped:
+    __slots__ = ('item', 'enqueued_at')
+
+    def __init__(self, item, enqueued_at):
+        self.item = item
+        self.enqueued_at = enqueued_at
+
+def put_stamped(queue, item):
+    queue.put(Stamped(item, time.perf_counter()))
+
+# 지연 시간 히스토그램은 마이크로초 단위의 로그 구간을 사용한다
+# 2의 거듭제곱 구간 하나를 다시 4개로 나누므로 어떤 값이든 실제 값과 25% 이내로 차이 나는 구간에 들어간다
+# 구간 번호는 정수의 상위 3비트만으로 계산하므로 log를 호출하지 않아도 된다
+HISTOGRAM_BUCKETS = 160
+
+def bucket_of(seconds):
+    micros = int(seconds * 1_000_000)
+    if micros < 4:
+        return micros
+    shift = micros.bit_length() - 3
+    return min(shift * 4 + (micros >> shift), HISTOGRAM_BUCKETS - 1)
+
+def bucket_limit(index):
+    if index < 4:
+        return index + 1
+    shift = index // 4 - 1
+    return (index % 4 + 5) << shift
+
+# 히스토그램에서 q 분위수가 속한 구간의 상한(초)을 구한다
+def percentile(histogram, q):
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    threshold = q * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= threshold:
+            return bucket_limit(i) / 1_000_000
+    return bucket_limit(HISTOGRAM_BUCKETS - 1) / 1_000_000
+
+class WorkerCounters:
+    __slots__ = ('items', 'func_time', 'get_wait', 'put_wait', 'latency')
+
+    def __init__(self):
+        self.items = 0
+        self.func_time = 0.0
+        self.get_wait = 0.0
+        self.put_wait = 0.0
+        self.latency = [0] * HISTOGRAM_BUCKETS
+
+class InstrumentedWorker(StoppableWorker):
+    def __init__(self, func, in_queue, out_queue, counters):
+        super().__init__(func, in_queue, out_queue)
+        self.counters = counters
+
+    # 원소 하나마다 시각을 네 번 읽고 카운터 다섯 개를 갱신한다
+    # 자주 쓰는 메서드는 지역 변수에 담아 두어 속성 조회 비용을 줄인다
+    def run(self):
+        counters = self.counters
+        latency = counters.latency
+        clock = time.perf_counter
+        get = self.in_queue.get
+        put = self.out_queue.put
+        task_done = self.in_queue.task_done
+        func = self.func
+        sentinel = self.in_queue.SENTINEL
+        while True:
+            start = clock()
+            stamped = get()
+            got = clock()
+            try:
+                if stamped is sentinel:
+                    return   # 스레드를 종료시킨다
+                result = func(stamped.item)
+                done = clock()
+                put(Stamped(result, stamped.enqueued_at))
+                end = clock()
+            finally:
+                task_done()
+            counters.items += 1
+            counters.get_wait += got - start
+            counters.func_time += done - got
+            counters.put_wait += end - done
+            latency[bucket_of(end - stamped.enqueued_at)] += 1
+
+StageSnapshot = namedtuple(
+    'StageSnapshot',
+    'name items func_time get_wait put_wait depth latency')
+
+class InstrumentedStage:
+    def __init__(self, name, count, func, in_queue, out_queue,
+                 depth_history=1000):
+        self.name = name
+        self.in_queue = in_queue
+        self.counters = [WorkerCounters() for _ in range(count)]
+        self.threads = [
+            InstrumentedWorker(func, in_queue, out_queue, counters)
+            for counters in self.counters]
+        self.depths = deque(maxlen=depth_history)  # (시각, 큐 길이)
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        stop_threads(self.in_queue, self.threads)
+
+    def sample_depth(self, now):
+        self.depths.append((now, self.in_queue.qsize()))
+
+    def snapshot(self):
+        latency = [0] * HISTOGRAM_BUCKETS
+        for counters in self.counters:
+            for i, count in enumerate(counters.latency):
+                latency[i] += count
+        return StageSnapshot(
+            name=self.name,
+            items=sum(c.items for c in self.counters),
+            func_time=sum(c.func_time for c in self.counters),
+            get_wait=sum(c.get_wait for c in self.counters),
+            put_wait=sum(c.put_wait for c in self.counters),
+            depth=self.in_queue.qsize(),
+            latency=latency)
+
+# 구간 경계 확인: 모든 값은 자기 구간의 상한보다 작고, 바로 앞 구간의 상한 이상이다
+for micros in range(1, 100_000):
+    index = bucket_of(micros / 1_000_000 + 1e-12)
+    assert micros < bucket_limit(index), micros
+    assert index == 0 or micros >= bucket_limit(index - 1), micros
+
+def snapshot(stages):
+    return [stage.snapshot() for stage in stages]
+
+def format_snapshot(snapshots):
+    lines = []
+    for s in snapshots:
+        per_item = s.func_time / s.items * 1000 if s.items else 0.0
+        lines.append(
+            f'{s.name:>8}: {s.items:>6}개, '
+            f'func {s.func_time:6.2f}초({per_item:.2f}ms/개), '
+            f'get 대기 {s.get_wait:6.2f}초, put 대기 {s.put_wait:6.2f}초, '
+            f'큐 {s.depth:>4}, '
+            f'지연 p50 {percentile(s.latency, 0.5) * 1000:.1f}ms '
+            f'p99 {percentile(s.latency, 0.99) * 1000:.1f}ms')
+    return '\n'.join(lines)
+
+# interval마다 큐 길이 표본을 기록하고, report가 있으면 스냅숏을 넘겨 호출한다
+class Reporter(Thread):
+    def __init__(self, stages, interval=0.1, report=None):
+        super().__init__(daemon=True)
+        self.stages = stages
+        self.interval = interval
+        self.report = report
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            now = time.perf_counter()
+            for stage in self.stages:
+                stage.sample_depth(now)
+            if self.report:
+                self.report(snapshot(self.stages))
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def make_pipeline(counts, funcs, maxsize=0):
+    queues = [ClosableQueue(maxsize) for _ in range(len(funcs))]
+    done_queue = ClosableQueue()
+    out_queues = queues[1:] + [done_queue]
+    stages = [
+        InstrumentedStage(func.__name__, count, func, in_queue, out_queue)
+        for count, func, in_queue, out_queue
+        in zip(counts, funcs, queues, out_queues)]
+    return queues[0], stages, done_queue
+
+# resize가 병목인 파이프라인. 큐의 크기를 제한했으므로 앞 단계는 put에서 막히고 뒤 단계는 get에서 논다
+def slow_download(item):
+    time.sleep(0.0005)
+    return item
+
+def slow_resize(item):
+    time.sleep(0.004)
+    return item
+
+def slow_upload(item):
+    time.sleep(0.0005)
+    return item
+
+def print_report(snapshots):
+    print(format_snapshot(snapshots))
+    print()
+
+in_queue, stages, done_queue = make_pipeline(
+    (2, 2, 2), (slow_download, slow_resize, slow_upload), maxsize=20)
+reporter = Reporter(stages, interval=0.4, report=print_report)
+for stage in stages:
+    stage.start()
+reporter.start()
+
+for i in range(500):
+    put_stamped(in_queue, i)
+
+for stage in stages:
+    stage.stop()
+reporter.stop()
+
+print('최종 결과')
+print(format_snapshot(snapshot(stages)))
+depths = [depth for _, depth in stages[1].depths]
+print(f'slow_resize 큐 길이 표본: {depths}')
+assert sorted(stamped.item for stamped in done_queue.queue) == list(range(500))
+
+# 같은 파이프라인을 계측 없이, 그리고 계측과 Reporter를 켜고 실행해서 처리량을 비교한다
+def run_plain(funcs, count):
+    queues = [ClosableQueue() for _ in range(len(funcs) + 1)]
+    start = time.perf_counter()
+    threads = [
+        start_threads(1, func, in_queue, out_queue)
+        for func, in_queue, out_queue in zip(funcs, queues, queues[1:])]
+    for _ in range(count):
+        queues[0].put(object())
+    for in_queue, stage_threads in zip(queues, threads):
+        stop_threads(in_queue, stage_threads)
+    return count / (time.perf_counter() - start)
+
+def run_instrumented(funcs, count):
+    in_queue, stages, done_queue = make_pipeline((1,) * len(funcs), funcs)
+    reporter = Reporter(stages, interval=0.1)
+    start = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    reporter.start()
+    for _ in range(count):
+        put_stamped(in_queue, object())
+    for stage in stages:
+        stage.stop()
+    reporter.stop()
+    return count / (time.perf_counter() - start)
+
+def benchmark(label, funcs, count):
+    plain = max(run_plain(funcs, count) for _ in range(3))
+    instrumented = max(run_instrumented(funcs, count) for _ in range(3))
+    overhead = (1 / instrumented - 1 / plain) / len(funcs) * 1e6
+    print(f'{label}: 계측 없음 {plain:,.0f}개/초, 계측 포함 {instrumented:,.0f}개/초 '
+          f'(단계당 원소 하나에 {overhead:.1f}us, '
+          f'{(plain / instrumented - 1) * 100:.1f}% 느림)')
+
+# 계측 비용을 잴 때는 세 단계가 모두 0.5ms가 걸리도록 병목이 없는 resize를 쓴다
+def steady_resize(item):
+    time.sleep(0.0005)
+    return item
+
+def main():
+    benchmark('빈 단계', (download, resize, upload), 100_000)
+    benchmark('0.5ms 단계', (slow_download, steady_resize, slow_upload), 2_000)
+
+if __name__ == '__main__':
+    main()
+
+# slow_download:    500개, func   0.31초(0.61ms/개), get 대기   0.00초, put 대기   1.71초, 큐    0, 지연 p50 49.2ms p99 57.3ms
+# slow_resize:    500개, func   2.09초(4.17ms/개), get 대기   0.01초, put 대기   0.01초, 큐    0, 지연 p50 98.3ms p99 114.7ms
+# slow_upload:    500개, func   0.30초(0.61ms/개), get 대기   1.80초, put 대기   0.00초, 큐    0, 지연 p50 98.3ms p99 114.7ms
+# 빈 단계: 계측 없음 61,989개/초, 계측 포함 43,749개/초 (단계당 원소 하나에 2.2us, 41.7% 느림)
+# 0.5ms 단계: 계측 없음 1,516개/초, 계측 포함 1,515개/초 (단계당 원소 하나에 0.2us, 0.1% 느림)
+
+# 스냅숏만 봐도 병목이 드러난다. slow_resize는 func에 시간을 쓰고,
+# 앞 단계는 put에서, 뒤 단계는 get에서 그만큼 기다린다
+# 계측 비용은 단계마다 원소 하나에 약 2us다. 단계가 아무 일도 하지 않으면 눈에 띄지만,
+# 세 단계가 모두 원소 하나에 0.5ms씩 걸리면 sleep 오차에 묻혀서 차이가 드러나지 않는다
+# (CPU 하나짜리 환경에서 잰 값이라 실행할 때마다 -1~1% 사이에서 흔들린다)
@@ -0,0 +1,410 @@
+# CPU를 많이 쓰는 단계는 프로세스에서 실행하고, 큰 데이터는 공유 메모리로 넘겨라
+
+# Better_Way55 파이프라인의 resize는 이미지 처리를 흉내 낸 함수로, 실제로는 CPU를 많이 사용한다
+# StoppableWorker 스레드를 여러 개 붙여도 GIL 때문에 한 번에 하나의 스레드만 파이썬 코드를 실행한다
+
+# ProcessWorker는 StoppableWorker와 같은 ClosableQueue 입출력을 사용하지만,
+# 각 작업자 스레드가 자식 프로세스를 하나씩 맡아서 func를 그 프로세스에서 실행한다
+# 스레드는 자식 프로세스의 응답을 기다리는 동안 GIL을 놓으므로 작업자 수만큼 프로세스가 동시에 계산할 수 있다
+# start_threads/stop_threads를 그대로 쓸 수 있도록 작업자 하나당 센티넬 하나로 종료한다
+
+# 원소를 그냥 파이프로 보내면 pickle이 이미지 버퍼 전체를 직렬화한 바이트열을 만들고, 그것을 다시 파이프로 복사한다
+# 여기서는 pickle 프로토콜 5의 대역 외(out-of-band) 버퍼를 사용한다
+# - Image는 __reduce_ex__에서 픽셀 버퍼를 PickleBuffer로 감싸서 돌려준다
+# - pickle.dumps에 buffer_callback을 넘기면 픽셀은 직렬화 결과에 들어가지 않고 콜백으로 따로 전달된다
+# - 이 버퍼는 multiprocessing.shared_memory 블록에 바로 복사하고, 파이프로는 작은 메타데이터만 보낸다
+# - 자식 프로세스는 공유 메모리에서 버퍼를 bytearray로 복사해 낸 뒤 pickle.loads(buffers=...)로 원소를 복원한다
+# 결과도 같은 방법으로 돌려받는다
+
+# 공유 메모리 블록은 원소마다 새로 만들지 않고 다음 원소에 다시 쓴다
+# NumPy 배열처럼 복원할 때 받은 버퍼를 복사하지 않고 그대로 가리키는 타입이 많으므로,
+# 블록의 메모리 뷰를 그대로 넘기면 다음 원소가 이전 결과를 덮어쓰고 블록도 닫을 수 없게 된다
+# 그래서 복사는 원소를 받는 쪽에서 딱 한 번, 블록을 벗어날 때 한다
+
+# 자식 프로세스는 spawn으로 시작하므로 이 모듈을 다시 임포트한다
+# 그래서 다른 예제와 달리 실행하는 코드는 모두 main 안에 둔다
+
+from multiprocessing import shared_memory
+from queue import Queue
+from threading import Lock
+from threading import Thread
+import multiprocessing
+import os
+import pickle
+import time
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+
+def start_threads(count, *args, worker=StoppableWorker):
+    threads = [worker(*args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def stop_threads(closable_queue, threads):
+    for _ in threads:
+        closable_queue.close()
+
+    closable_queue.join()
+
+    for thread in threads:
+        thread.join()
+
+class Image:
+    def __init__(self, width, height, pixels):
+        self.width = width
+        self.height = height
+        self.pixels = pixels
+
+    # 프로토콜 5 이상이면 픽셀을 복사하지 않고 대역 외 버퍼로 내보낸다
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            pixels = pickle.PickleBuffer(self.pixels)
+        else:
+            pixels = bytes(self.pixels)
+        return Image, (self.width, self.height, pixels)
+
+# 원소를 (메타데이터, 대역 외 버퍼 목록)으로 직렬화한다
+def dump(item):
+    buffers = []
+    meta = pickle.dumps(item, protocol=5, buffer_callback=buffers.append)
+    return meta, [buffer.raw() for buffer in buffers]
+
+# 버퍼들을 공유 메모리에 차례로 복사하고 (오프셋, 길이) 목록을 돌려준다
+def write_buffers(block, raw_buffers):
+    layout = []
+    offset = 0
+    for raw in raw_buffers:
+        block.buf[offset:offset + raw.nbytes] = raw
+        layout.append((offset, raw.nbytes))
+        offset += raw.nbytes
+    return layout
+
+# 블록은 다음 원소에 다시 쓰이므로 버퍼를 bytearray로 복사한 다음에 복원한다
+# 복원된 원소는 이 bytearray를 소유하므로 블록의 메모리 뷰는 하나도 남지 않는다
+def read_item(meta, block, layout):
+    buffers = []
+    for offset, length in layout:
+        with block.buf[offset:offset + length] as view:
+            buffers.append(bytearray(view))
+    return pickle.loads(meta, buffers=buffers)
+
+def total_size(raw_buffers):
+    return sum(raw.nbytes for raw in raw_buffers)
+
+# 공유 메모리 블록은 부모(ProcessWorker)가 만들고 지운다. 자식은 이름으로 연결만 한다
+class Attached:
+    def __init__(self):
+        self.block = None
+
+    def get(self, name):
+        if self.block is None or self.block.name != name:
+            self.close()
+            self.block = shared_memory.SharedMemory(name=name)
+        return self.block
+
+    def close(self):
+        if self.block is not None:
+            self.block.close()
+            self.block = None
+
+# 자식 프로세스에서 실행되는 루프
+# func에서 난 예외는 부모에게 돌려보내고 다음 원소를 계속 처리한다
+def serve(func, conn, use_shared_memory):
+    request = Attached()
+    response = Attached()
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                return
+            if not use_shared_memory:
+                try:
+                    conn.send(('done', func(message)))
+                except Exception as e:
+                    conn.send(('error', e))
+                continue
+
+            meta, request_name, layout, response_name, response_size = message
+            # 결과를 직렬화하다 난 예외도 func의 예외처럼 부모에게 돌려보낸다
+            try:
+                item = read_item(meta, request.get(request_name), layout)
+                meta, raw_buffers = dump(func(item))
+            except Exception as e:
+                conn.send(('error', e))
+                continue
+
+            size = total_size(raw_buffers)
+            if size > response_size:
+                conn.send(('grow', size))
+                response_name = conn.recv()
+            layout = write_buffers(response.get(response_name), raw_buffers)
+            conn.send(('done', meta, layout))
+    finally:
+        request.close()
+        response.close()
+        conn.close()
+
+class ProcessWorker(StoppableWorker):
+    def __init__(self, func, in_queue, out_queue, use_shared_memory=True):
+        super().__init__(func, in_queue, out_queue)
+        self.use_shared_memory = use_shared_memory
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=serve, args=(func, child_conn, use_shared_memory))
+        self.request = None
+        self.response = None
+
+    # 블록이 작으면 두 배 이상으로 새로 만든다. 이전 블록은 자식이 아직 연결되어 있어도 바로 지울 수 있다
+    @staticmethod
+    def ensure(block, size):
+        if block is not None and block.size >= size:
+            return block
+        if block is not None:
+            block.close()
+            block.unlink()
+        new_size = max(size, 2 * block.size if block else 0, 1)
+        return shared_memory.SharedMemory(create=True, size=new_size)
+
+    def call(self, item):
+        if not self.use_shared_memory:
+            self.conn.send(item)
+            kind, value = self.conn.recv()
+            return value
+
+        meta, raw_buffers = dump(item)
+        self.request = self.ensure(self.request, total_size(raw_buffers))
+        if self.response is None:
+            self.response = self.ensure(None, total_size(raw_buffers))
+        layout = write_buffers(self.request, raw_buffers)
+        self.conn.send((meta, self.request.name, layout,
+                        self.response.name, self.response.size))
+
+        reply = self.conn.recv()
+        if reply[0] == 'grow':
+            self.response = self.ensure(self.response, reply[1])
+            self.conn.send(self.response.name)
+            reply = self.conn.recv()
+        if reply[0] == 'error':
+            return reply[1]
+        _, meta, layout = reply
+        return read_item(meta, self.response, layout)
+
+    # func에서 예외가 나면 Better_Way58의 game_logic_thread처럼 예외 객체를 결과 대신 다음 큐로 넘긴다
+    def run(self):
+        self.process.start()
+        try:
+            for item in self.in_queue:
+                self.out_queue.put(self.call(item))
+        finally:
+            # 자식 프로세스가 이미 죽었어도 공유 메모리 블록은 반드시 지운다
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.process.join()
+                self.conn.close()
+            finally:
+                for block in (self.request, self.response):
+                    if block is not None:
+                        block.close()
+                        block.unlink()
+
+def download(item):
+    return item
+
+# 픽셀마다 파이썬 코드를 실행해서 가로 크기를 절반으로 줄이고 밝기를 조정한다. GIL을 놓지 않는 CPU 작업이다
+BRIGHTEN = bytes(min(255, value + 16) for value in range(256))
+
+def resize(image):
+    pixels = bytes(map(BRIGHTEN.__getitem__, image.pixels[::2]))
+    return Image(image.width // 2, image.height, pixels)
+
+# 픽셀마다 반전한다. translate는 C로 구현되어 있어 데이터를 옮기는 비용이 계산 비용보다 크다
+INVERT = bytes(255 - value for value in range(256))
+
+def invert(image):
+    return Image(image.width, image.height, image.pixels.translate(INVERT))
+
+def upload(item):
+    return item
+
+def fail_on_empty(image):
+    if not image.pixels:
+        raise ValueError('빈 이미지')
+    return image
+
+def double(array):
+    return array * 2
+
+# 락은 pickle로 직렬화할 수 없으므로 결과를 돌려보낼 때 예외가 난다
+def unpicklable(image):
+    return Lock()
+
+def run_pipeline(images, func, count, worker, **kwargs):
+    download_queue = ClosableQueue()
+    resize_queue = ClosableQueue()
+    upload_queue = ClosableQueue()
+    done_queue = ClosableQueue()
+
+    download_threads = start_threads(
+        1, download, download_queue, resize_queue)
+    if kwargs:
+        resize_threads = [
+            worker(func, resize_queue, upload_queue, **kwargs)
+            for _ in range(count)]
+        for thread in resize_threads:
+            thread.start()
+    else:
+        resize_threads = start_threads(
+            count, func, resize_queue, upload_queue, worker=worker)
+    upload_threads = start_threads(
+        1, upload, upload_queue, done_queue)
+
+    # 자식 프로세스가 시작되는 시간은 빼고 잰다
+    time.sleep(0.5)
+    start = time.perf_counter()
+    for image in images:
+        download_queue.put(image)
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    elapsed = time.perf_counter() - start
+
+    results = list(done_queue.queue)
+    assert len(results) == len(images)
+    return elapsed, results
+
+def make_images(size, count):
+    width = 1024
+    height = size // width
+    return [
+        Image(width, height, bytearray(os.urandom(width * height)))
+        for _ in range(count)]
+
+def benchmark(func, size, count, workers):
+    images = make_images(size, count)
+    expected = sorted(bytes(func(image).pixels) for image in images)
+
+    timings = {}
+    for label, worker, kwargs in [
+            ('스레드', StoppableWorker, {}),
+            ('프로세스(파이프)', ProcessWorker, dict(use_shared_memory=False)),
+            ('프로세스(공유 메모리)', ProcessWorker, dict(use_shared_memory=True))]:
+        elapsed, results = run_pipeline(
+            images, func, workers, worker, **kwargs)
+        assert sorted(bytes(image.pixels) for image in results) == expected
+        timings[label] = elapsed
+
+    total_mb = size * count / 2**20
+    print(f'{func.__name__} {size // 1024:>5}KB x {count:>3}개: ' + ', '.join(
+        f'{label} {total_mb / elapsed:,.0f}MB/초'
+        for label, elapsed in timings.items()))
+
+def main():
+    # 자식 프로세스도 이 모듈을 임포트하므로 numpy는 부모에서만 불러온다
+    import numpy as np
+
+    # 공유 메모리 블록이 자라는 경우와 자식의 예외가 부모에게 전달되는 경우를 확인한다
+    images = [make_images(size, 1)[0] for size in (1024, 64 * 1024, 4 * 1024 * 1024)]
+    elapsed, results = run_pipeline(
+        images, resize, 1, ProcessWorker, use_shared_memory=True)
+    assert sorted(len(image.pixels) for image in results) == [512, 32 * 1024, 2 * 1024 * 1024]
+
+    in_queue = ClosableQueue()
+    out_queue = ClosableQueue()
+    threads = [ProcessWorker(fail_on_empty, in_queue, out_queue)]
+    threads[0].start()
+    in_queue.put(Image(0, 0, bytearray()))
+    in_queue.put(Image(1, 1, bytearray(b'*')))
+    stop_threads(in_queue, threads)
+    error, image = list(out_queue.queue)
+    print('예외 전달:', repr(error), '/ 다음 원소:', bytes(image.pixels))
+
+    # 결과를 직렬화할 수 없어도 자식 프로세스는 예외를 돌려보내고 계속 동작한다
+    in_queue = ClosableQueue()
+    out_queue = ClosableQueue()
+    threads = [
+        ProcessWorker(unpicklable, in_queue, out_queue),
+        ProcessWorker(unpicklable, in_queue, out_queue, use_shared_memory=False)]
+    for thread in threads:
+        thread.start()
+    for _ in range(4):
+        in_queue.put(Image(1, 1, bytearray(b'*')))
+    stop_threads(in_queue, threads)
+    errors = list(out_queue.queue)
+    assert len(errors) == 4 and all(isinstance(e, TypeError) for e in errors), errors
+    print('직렬화 예외 전달:', repr(errors[0]))
+
+    # NumPy 배열은 복원할 때 받은 버퍼를 복사하지 않고 그대로 사용한다
+    # 두 번째 원소가 같은 공유 메모리 블록을 다시 써도 첫 번째 결과가 바뀌지 않는지 확인한다
+    in_queue = ClosableQueue()
+    out_queue = ClosableQueue()
+    threads = [ProcessWorker(double, in_queue, out_queue)]
+    threads[0].start()
+    in_queue.put(np.full(10, 1))
+    in_queue.put(np.full(10, 50))
+    stop_threads(in_queue, threads)
+    first, second = list(out_queue.queue)
+    assert first.tolist() == [2] * 10, first
+    assert second.tolist() == [100] * 10, second
+    print('NumPy 결과:', first[0], second[0])
+
+    print(f'CPU {os.cpu_count()}개, 작업자 4개')
+    for func in (resize, invert):
+        benchmark(func, 64 * 1024, 64, 4)
+        benchmark(func, 1024 * 1024, 16, 4)
+        benchmark(func, 16 * 1024 * 1024, 4, 4)
+
+if __name__ == '__main__':
+    main()
+
+# 예외 전달: ValueError('빈 이미지') / 다음 원소: b'*'
+# 직렬화 예외 전달: TypeError("cannot pickle '_thread.lock' object")
+# NumPy 결과: 2 100
+# CPU 1개, 작업자 4개
+# resize    64KB x  64개: 스레드 18MB/초, 프로세스(파이프) 15MB/초, 프로세스(공유 메모리) 17MB/초
+# resize  1024KB x  16개: 스레드 17MB/초, 프로세스(파이프) 18MB/초, 프로세스(공유 메모리) 17MB/초
+# resize 16384KB x   4개: 스레드 20MB/초, 프로세스(파이프) 22MB/초, 프로세스(공유 메모리) 19MB/초
+# invert    64KB x  64개: 스레드 674MB/초, 프로세스(파이프) 44MB/초, 프로세스(공유 메모리) 38MB/초
+# invert  1024KB x  16개: 스레드 1,107MB/초, 프로세스(파이프) 69MB/초, 프로세스(공유 메모리) 92MB/초
+# invert 16384KB x   4개: 스레드 793MB/초, 프로세스(파이프) 79MB/초, 프로세스(공유 메모리) 175MB/초
+
+# 이 결과는 CPU가 하나뿐인 환경에서 잰 것이므로 프로세스를 늘려도 계산이 동시에 진행되지 않는다
+# 그래서 resize처럼 계산이 대부분인 단계에서는 세 방식이 비슷하고, CPU가 N개인 환경에서는 프로세스 방식이 최대 N배까지 빨라진다
+# invert처럼 계산이 거의 없는 단계에서는 데이터를 옮기는 비용이 전부다
+# 같은 주소 공간에서 참조만 넘기는 스레드를 이길 수는 없지만, 버퍼가 클수록 공유 메모리가 파이프보다 유리하다
+# 파이프 방식은 pickle이 버퍼를 직렬화한 바이트열을 만든 뒤 그것을 다시 파이프로 복사하기 때문이다
+# 작은 원소에서는 공유 메모리 블록에 복사하는 비용과 메시지 왕복 비용이 비슷해서 차이가 거의 없다
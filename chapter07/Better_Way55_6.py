@@ -0,0 +1,242 @@
+# 네트워크 단계는 코루틴으로, CPU 단계는 스레드 풀로 돌리는 asyncio 파이프라인을 만들어라
+
+# Better_Way55의 파이프라인은 스레드로만 이뤄져 있다
+# download와 upload는 사실상 네트워크 응답을 기다리는 단계라 코루틴이라면 수천 개를 동시에 진행할 수 있지만,
+# StoppableWorker 스레드로는 스레드 수만큼만 동시에 기다릴 수 있다
+
+# AsyncClosableQueue는 asyncio.Queue에 ClosableQueue와 같은 close/센티넬 규칙을 더한 것이다
+# start_tasks/stop_tasks는 start_threads/stop_threads와 같은 방식으로 코루틴 작업자를 시작하고 끝낸다
+
+# resize처럼 CPU를 쓰는 블로킹 함수는 이벤트 루프에서 직접 실행하면 안 된다
+# start_thread_stage는 스레드 하나당 중계 코루틴 하나를 만들어서 run_in_executor로 함수를 스레드 풀에 넘긴다
+# - 위쪽: 중계 코루틴은 자기 스레드가 일을 마쳐야 다음 원소를 꺼내므로, 스레드가 모두 바쁘면 입력 큐가 차고
+#   앞 단계의 put이 기다리게 된다
+# - 아래쪽: 중계 코루틴은 결과를 출력 큐에 넣을 수 있을 때까지 기다렸다가 다음 원소를 받으므로,
+#   뒤 단계가 밀리면 스레드도 새 일을 받지 않는다
+
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Thread
+import asyncio
+import time
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+
+def start_threads(count, *args):
+    threads = [StoppableWorker(*args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def stop_threads(closable_queue, threads):
+    for _ in threads:
+        closable_queue.close()
+
+    closable_queue.join()
+
+    for thread in threads:
+        thread.join()
+
+class AsyncClosableQueue(asyncio.Queue):
+    SENTINEL = object()
+
+    async def close(self):
+        await self.put(self.SENTINEL)
+
+    async def __aiter__(self):
+        while True:
+            item = await self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 코루틴을 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+async def async_worker(func, in_queue, out_queue):
+    async for item in in_queue:
+        result = await func(item)
+        await out_queue.put(result)
+
+def start_tasks(count, func, in_queue, out_queue):
+    return [
+        asyncio.create_task(async_worker(func, in_queue, out_queue))
+        for _ in range(count)]
+
+async def stop_tasks(closable_queue, tasks):
+    for _ in tasks:
+        await closable_queue.close()
+
+    await closable_queue.join()
+
+    await asyncio.gather(*tasks)
+
+async def thread_worker(executor, func, in_queue, out_queue):
+    loop = asyncio.get_running_loop()
+    async for item in in_queue:
+        result = await loop.run_in_executor(executor, func, item)
+        await out_queue.put(result)
+
+# 스레드 count개로 이뤄진 단계. 중계 코루틴도 count개이므로 스레드 풀에 들어가는 일은 최대 count개다
+# stop_tasks로 중계 코루틴을 끝낸 뒤 executor.shutdown()을 호출해야 한다
+def start_thread_stage(count, func, in_queue, out_queue):
+    executor = ThreadPoolExecutor(max_workers=count)
+    tasks = [
+        asyncio.create_task(thread_worker(executor, func, in_queue, out_queue))
+        for _ in range(count)]
+    return executor, tasks
+
+# 네트워크 대기는 latency초 걸리고, resize는 약간의 CPU를 쓴다
+LATENCY = 0.1
+
+def download(item):
+    time.sleep(LATENCY)
+    return item
+
+def resize(item):
+    total = 0
+    for i in range(2000):
+        total += i
+    return item
+
+def upload(item):
+    time.sleep(LATENCY)
+    return item
+
+async def download_async(item):
+    await asyncio.sleep(LATENCY)
+    return item
+
+async def upload_async(item):
+    await asyncio.sleep(LATENCY)
+    return item
+
+async def run_async_pipeline(count, io_tasks, resize_threads, maxsize,
+                             upload=upload_async, monitor=None):
+    download_queue = AsyncClosableQueue(maxsize)
+    resize_queue = AsyncClosableQueue(maxsize)
+    upload_queue = AsyncClosableQueue(maxsize)
+    done_queue = AsyncClosableQueue()
+
+    download_tasks = start_tasks(
+        io_tasks, download_async, download_queue, resize_queue)
+    executor, resize_tasks = start_thread_stage(
+        resize_threads, resize, resize_queue, upload_queue)
+    upload_tasks = start_tasks(
+        io_tasks, upload, upload_queue, done_queue)
+
+    for i in range(count):
+        await download_queue.put(i)
+        if monitor:
+            monitor(i + 1 - done_queue.qsize())
+
+    await stop_tasks(download_queue, download_tasks)
+    await stop_tasks(resize_queue, resize_tasks)
+    executor.shutdown()
+    await stop_tasks(upload_queue, upload_tasks)
+
+    results = []
+    while not done_queue.empty():
+        results.append(done_queue.get_nowait())
+    return results
+
+def run_threaded_pipeline(count, threads_per_stage):
+    download_queue = ClosableQueue()
+    resize_queue = ClosableQueue()
+    upload_queue = ClosableQueue()
+    done_queue = ClosableQueue()
+    download_threads = start_threads(
+        threads_per_stage, download, download_queue, resize_queue)
+    resize_threads = start_threads(
+        threads_per_stage, resize, resize_queue, upload_queue)
+    upload_threads = start_threads(
+        threads_per_stage, upload, upload_queue, done_queue)
+
+    for i in range(count):
+        download_queue.put(i)
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    return list(done_queue.queue)
+
+def main():
+    # 뒤 단계(upload)가 느리면 크기 제한이 있는 큐가 차면서 앞 단계가 차례로 멈춘다
+    # 파이프라인 안에 들어와 있는 원소 수는 큐 크기와 작업자 수의 합을 넘지 않는다
+    async def slow_upload(item):
+        await asyncio.sleep(LATENCY * 4)
+        return item
+
+    in_flight = []
+    results = asyncio.run(run_async_pipeline(
+        100, io_tasks=4, resize_threads=2, maxsize=5,
+        upload=slow_upload, monitor=in_flight.append))
+    assert sorted(results) == list(range(100))
+    limit = 5 * 3 + 4 + 2 + 4
+    print(f'처리 중인 원소 수: 최대 {max(in_flight)}개 (한도 {limit}개)')
+    assert max(in_flight) <= limit
+
+    count = 2000
+    print(f'원소 {count}개, 단계마다 I/O 대기 {LATENCY * 1000:.0f}ms')
+    for threads in (50, 200, 1000):
+        start = time.perf_counter()
+        results = run_threaded_pipeline(count, threads)
+        elapsed = time.perf_counter() - start
+        assert sorted(results) == list(range(count))
+        print(f'스레드 파이프라인(단계마다 스레드 {threads}개): '
+              f'{count / elapsed:,.0f}개/초')
+
+    for io_tasks in (50, 200, 1000):
+        start = time.perf_counter()
+        results = asyncio.run(run_async_pipeline(
+            count, io_tasks=io_tasks, resize_threads=4, maxsize=io_tasks))
+        elapsed = time.perf_counter() - start
+        assert sorted(results) == list(range(count))
+        print(f'asyncio 파이프라인(I/O 코루틴 {io_tasks}개, resize 스레드 4개): '
+              f'{count / elapsed:,.0f}개/초')
+
+if __name__ == '__main__':
+    main()
+
+# 처리 중인 원소 수: 최대 25개 (한도 25개)
+# 원소 2000개, 단계마다 I/O 대기 100ms
+# 스레드 파이프라인(단계마다 스레드 50개): 484개/초
+# 스레드 파이프라인(단계마다 스레드 200개): 1,643개/초
+# 스레드 파이프라인(단계마다 스레드 1000개): 1,210개/초
+# asyncio 파이프라인(I/O 코루틴 50개, resize 스레드 4개): 477개/초
+# asyncio 파이프라인(I/O 코루틴 200개, resize 스레드 4개): 1,631개/초
+# asyncio 파이프라인(I/O 코루틴 1000개, resize 스레드 4개): 3,170개/초
+
+# 동시에 기다리는 수가 같으면 스레드와 코루틴의 처리량도 같다
+# 하지만 스레드는 단계마다 1000개(모두 3000개)로 늘리면 스레드를 만들고 전환하는 비용 때문에 오히려 느려진다
+# 코루틴은 1000개로 늘려도 계속 빨라지고, CPU를 쓰는 resize는 스레드 4개로 충분하다
+# 느린 upload 단계 앞에서는 큐가 모두 차서 파이프라인 안의 원소 수가 정확히 한도(큐 크기 합 + 작업자 수)에서 멈춘다
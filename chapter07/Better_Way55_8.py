@@ -0,0 +1,264 @@
+# 바쁜 대기 대신 Condition으로 깨우는 큐를 사용하라
+
+# Better_Way55의 MyQueue와 Worker는 큐가 비어 있으면 IndexError를 잡고 0.01초 잔 뒤에 다시 확인한다
+# 그 결과 폴링 횟수(polled_count)가 처리한 작업 수보다 훨씬 많아지고,
+# 주 스레드는 len(done_queue.items)를 확인하는 바쁜 대기로 CPU 하나를 통째로 쓴다
+# 반대로 일이 들어와도 최대 0.01초 동안 잠들어 있으므로 단계마다 지연 시간이 늘어난다
+
+# BlockingQueue는 deque와 Condition으로 만든다
+# - get은 원소가 생길 때까지 잠들어 있다가 put이 notify하면 바로 깨어난다
+# - timeout을 지정하면 그 시간 동안 원소가 없을 때 MyQueue와 같은 IndexError를 발생시킨다
+# BlockingWorker는 Worker의 polled_count/work_done을 그대로 유지한다
+# 이제 polled_count는 get을 호출한 횟수이므로 work_done보다 크다면 그만큼 timeout으로 헛걸음했다는 뜻이다
+# CountDownLatch는 정해진 개수의 작업이 끝날 때까지 주 스레드를 재운다
+
+from collections import deque
+from threading import Condition
+from threading import Lock
+from threading import Thread
+import time
+
+def download(item):
+    return item
+
+def resize(item):
+    return item
+
+def upload(item):
+    return item
+
+# 비교를 위해 Better_Way55의 폴링 방식을 그대로 옮겨 둔다
+# 원래 Worker는 끝나지 않으므로 running 플래그로 멈출 수 있게만 바꿨다
+class MyQueue:
+    def __init__(self):
+        self.items = deque()
+        self.lock = Lock()
+
+    def put(self, item):
+        with self.lock:
+            self.items.append(item)
+
+    def get(self):
+        with self.lock:
+            return self.items.popleft()
+
+class Worker(Thread):
+    def __init__(self, func, in_queue, out_queue):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.polled_count = 0
+        self.work_done = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.polled_count += 1
+            try:
+                item = self.in_queue.get()
+            except IndexError:
+                time.sleep(0.01) # 할 일이 없음
+            else:
+                result = self.func(item)
+                self.out_queue.put(result)
+                self.work_done += 1
+
+class BlockingQueue:
+    SENTINEL = object()
+
+    def __init__(self):
+        self.items = deque()
+        self.condition = Condition()
+
+    def put(self, item):
+        with self.condition:
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                raise IndexError('pop from an empty deque')
+            return self.items.popleft()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __len__(self):
+        return len(self.items)
+
+class CountDownLatch:
+    def __init__(self, count):
+        self.count = count
+        self.condition = Condition()
+
+    def count_down(self):
+        with self.condition:
+            self.count -= 1
+            if self.count <= 0:
+                self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.count <= 0, timeout)
+
+# timeout을 지정하면 그만큼 기다려도 일이 없을 때 get이 IndexError를 발생시키고 다시 기다린다
+# 센티넬을 받으면 종료한다. latch를 넘기면 작업 하나를 끝낼 때마다 count_down을 호출한다
+class BlockingWorker(Thread):
+    def __init__(self, func, in_queue, out_queue, timeout=None, latch=None):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.timeout = timeout
+        self.latch = latch
+        self.polled_count = 0
+        self.work_done = 0
+
+    def run(self):
+        while True:
+            self.polled_count += 1
+            try:
+                item = self.in_queue.get(self.timeout)
+            except IndexError:
+                continue  # 할 일이 없음. 다시 기다린다
+            if item is self.in_queue.SENTINEL:
+                return
+            result = self.func(item)
+            self.out_queue.put(result)
+            self.work_done += 1
+            if self.latch:
+                self.latch.count_down()
+
+download_queue = BlockingQueue()
+resize_queue = BlockingQueue()
+upload_queue = BlockingQueue()
+done_queue = BlockingQueue()
+latch = CountDownLatch(1000)
+threads = [
+    BlockingWorker(download, download_queue, resize_queue),
+    BlockingWorker(resize, resize_queue, upload_queue),
+    BlockingWorker(upload, upload_queue, done_queue, latch=latch),
+]
+
+for thread in threads:
+    thread.start()
+
+for _ in range(1000):
+    download_queue.put(object())
+
+latch.wait()  # 바쁜 대기 없이 1000개가 끝날 때까지 잠든다
+
+processed = len(done_queue)
+polled = sum(t.polled_count for t in threads)
+print(f'{processed} 개의 아이템을 처리했습니다, '
+      f'이때 폴링을 {polled} 번 했습니다.')
+
+for queue, thread in zip(
+        [download_queue, resize_queue, upload_queue], threads):
+    queue.close()
+    thread.join()
+
+# 원소를 보낸 시각을 원소로 사용해서, 마지막 단계가 끝난 시각과의 차이를 지연 시간으로 기록한다
+def make_recorder(latencies):
+    def record(sent_at):
+        latencies.append(time.perf_counter() - sent_at)
+        return sent_at
+    return record
+
+# 생산자는 별도 스레드에서 interval 간격으로 원소를 넣고, 주 스레드는 처음부터 완료를 기다린다
+def start_producer(queue, count, interval):
+    def produce():
+        for _ in range(count):
+            queue.put(time.perf_counter())
+            if interval:
+                time.sleep(interval)
+    producer = Thread(target=produce)
+    producer.start()
+    return producer
+
+def run_polling(count, interval):
+    queues = [MyQueue() for _ in range(4)]
+    latencies = []
+    funcs = [download, resize, make_recorder(latencies)]
+    threads = [
+        Worker(func, in_queue, out_queue)
+        for func, in_queue, out_queue in zip(funcs, queues, queues[1:])]
+
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    producer = start_producer(queues[0], count, interval)
+    while len(queues[-1].items) < count:
+        pass  # 바쁜 대기
+    elapsed = time.perf_counter() - start
+    cpu_time = time.process_time() - start_cpu
+
+    producer.join()
+    for thread in threads:
+        thread.running = False
+        thread.join()
+    polled = sum(t.polled_count for t in threads)
+    return elapsed, cpu_time, latencies, polled
+
+def run_blocking(count, interval):
+    queues = [BlockingQueue() for _ in range(4)]
+    latencies = []
+    latch = CountDownLatch(count)
+    funcs = [download, resize, make_recorder(latencies)]
+    threads = [
+        BlockingWorker(func, in_queue, out_queue)
+        for func, in_queue, out_queue in zip(funcs, queues, queues[1:])]
+    threads[-1].latch = latch
+
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    producer = start_producer(queues[0], count, interval)
+    latch.wait()
+    elapsed = time.perf_counter() - start
+    cpu_time = time.process_time() - start_cpu
+
+    producer.join()
+    for queue, thread in zip(queues, threads):
+        queue.close()
+        thread.join()
+    polled = sum(t.polled_count for t in threads)
+    return elapsed, cpu_time, latencies, polled
+
+def benchmark(label, count, interval):
+    print(f'{label}: 원소 {count}개, 간격 {interval * 1000:g}ms')
+    for name, run in [('폴링', run_polling), ('블로킹', run_blocking)]:
+        elapsed, cpu_time, latencies, polled = run(count, interval)
+        latencies.sort()
+        mean = sum(latencies) / len(latencies)
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f'  {name}: {elapsed:.2f}초, CPU {cpu_time:.2f}초'
+              f'({cpu_time / elapsed * 100:.0f}%), '
+              f'지연 평균 {mean * 1000:.2f}ms p99 {p99 * 1000:.2f}ms, '
+              f'폴링 {polled}번')
+
+def main():
+    benchmark('낮은 도착률', 200, 0.005)
+    benchmark('높은 도착률', 20_000, 0)
+
+if __name__ == '__main__':
+    main()
+
+# 1000 개의 아이템을 처리했습니다, 이때 폴링을 3003 번 했습니다.
+# 낮은 도착률: 원소 200개, 간격 5ms
+#   폴링: 1.98초, CPU 1.96초(99%), 지연 평균 21.72ms p99 36.17ms, 폴링 1145번
+#   블로킹: 1.04초, CPU 0.04초(4%), 지연 평균 0.18ms p99 1.54ms, 폴링 603번
+# 높은 도착률: 원소 20000개, 간격 0ms
+#   폴링: 0.32초, CPU 0.31초(96%), 지연 평균 186.78ms p99 267.58ms, 폴링 60020번
+#   블로킹: 0.28초, CPU 0.28초(99%), 지연 평균 102.85ms p99 150.13ms, 폴링 60003번
+
+# 일이 드문드문 들어올 때 차이가 가장 크다
+# 폴링 방식은 주 스레드의 바쁜 대기가 CPU를 다 쓰고 GIL까지 빼앗아서 생산자조차 제시간에 원소를 넣지 못한다
+# 작업자는 빈 큐를 만나면 10ms씩 자므로 단계마다 지연이 쌓인다
+# 블로킹 방식은 기다리는 동안 CPU를 거의 쓰지 않고, 원소가 들어오는 즉시 깨어나 1ms 안에 처리한다
+# 일이 계속 밀려드는 경우에는 두 방식 모두 큐가 비지 않으므로 폴링 횟수가 작업 수와 같아지고 CPU를 다 쓴다
+# 이때의 지연 시간은 원소가 큐에 쌓여 있던 시간이고, 블로킹 방식이 바쁜 대기에 CPU를 나눠 주지 않는 만큼 짧다
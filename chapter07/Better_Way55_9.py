@@ -0,0 +1,254 @@
+# 과부하 상황에서는 우선순위와 마감 시간을 보고 꺼낼 원소를 골라라
+
+# chapter07의 파이프라인 큐는 모두 FIFO다
+# 처리 능력보다 일이 많이 들어오면 급한 원소도 밀린 원소들 뒤에서 기다리고,
+# 이미 마감 시간이 지나 쓸모없어진 원소까지 처리하느라 단계의 처리 능력을 낭비한다
+
+# DeadlineQueue는 ClosableQueue를 상속하지만 내부 저장소를 힙으로 바꾼 큐다
+# - 원소에 priority와 deadline 속성이 있으면 그 값을 사용한다(없으면 우선순위 0, 마감 없음)
+#   우선순위 숫자가 작을수록 먼저 꺼내고, 같은 우선순위 안에서는 마감이 빠른 것부터 꺼낸다
+# - get은 마감이 지난 원소를 만나면 버리거나 dead_letter 큐로 보내고 다음 원소를 꺼낸다
+# - 센티넬은 우선순위가 가장 낮으므로 남아 있는 원소를 모두 처리한 뒤에 작업자를 종료시킨다
+# - dropped는 꺼낼 때 마감이 지나서 버린 원소 수, late는 넣을 때 이미 마감이 지나 있었고 아직 버리지 않은 원소 수다
+#   넣을 때 late로 센 원소를 get이 버리면 late에서 빼고 dropped로 옮기므로 한 원소는 한쪽에만 들어간다
+#   get으로 꺼내지 않는 파이프라인 끝의 큐에서 late를 보면 늦게 완료된 원소 수를 알 수 있다
+
+from queue import Empty
+from queue import Queue
+from threading import Thread
+from threading import Timer
+import heapq
+import itertools
+import math
+import random
+import time
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue):
+        super().__init__()
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+
+def start_threads(count, *args):
+    threads = [StoppableWorker(*args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def stop_threads(closable_queue, threads):
+    for _ in threads:
+        closable_queue.close()
+
+    closable_queue.join()
+
+    for thread in threads:
+        thread.join()
+
+class Request:
+    __slots__ = ('name', 'priority', 'deadline')
+
+    def __init__(self, name, priority=0, deadline=None):
+        self.name = name
+        self.priority = priority
+        self.deadline = deadline
+
+    def __repr__(self):
+        return f'Request({self.name!r})'
+
+class DeadlineQueue(ClosableQueue):
+    def __init__(self, maxsize=0, dead_letter=None, clock=time.monotonic):
+        super().__init__(maxsize)
+        self.dead_letter = dead_letter
+        self.clock = clock
+        self.order = itertools.count()  # 우선순위와 마감이 같으면 넣은 순서대로 꺼낸다
+        self.dropped = 0
+        self.late = 0
+
+    # Queue는 _init/_qsize/_put/_get으로 저장소를 다룬다. PriorityQueue와 같은 방법으로 힙을 사용한다
+    def _init(self, maxsize):
+        self.queue = []
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, entry):
+        heapq.heappush(self.queue, entry)
+
+    def _get(self):
+        return heapq.heappop(self.queue)
+
+    def put(self, item, block=True, timeout=None):
+        if item is self.SENTINEL:
+            priority, deadline = math.inf, math.inf
+        else:
+            priority = getattr(item, 'priority', 0)
+            deadline = getattr(item, 'deadline', None)
+            if deadline is None:
+                deadline = math.inf
+        # order가 모두 다르므로 힙은 item과 was_late까지 비교하지 않는다
+        was_late = deadline < self.clock()
+        if was_late:
+            with self.mutex:
+                self.late += 1
+        entry = (priority, deadline, next(self.order), item, was_late)
+        super().put(entry, block, timeout)
+
+    # 마감이 지난 원소를 버리고 다시 기다릴 때도 처음 정한 timeout을 넘기지 않도록 남은 시간만 넘긴다
+    def get(self, block=True, timeout=None):
+        end = None
+        if block and timeout is not None:
+            end = time.monotonic() + timeout
+        while True:
+            if end is not None:
+                timeout = max(0, end - time.monotonic())
+            _, deadline, _, item, was_late = super().get(block, timeout)
+            if item is self.SENTINEL or deadline >= self.clock():
+                return item
+            # 버린 원소도 꺼낸 원소이므로 task_done을 호출해야 join이 끝난다
+            self.task_done()
+            with self.mutex:
+                self.dropped += 1
+                if was_late:
+                    self.late -= 1
+            if self.dead_letter is not None:
+                self.dead_letter.put(item)
+
+now = time.monotonic()
+dead_letter = ClosableQueue()
+in_queue = DeadlineQueue(dead_letter=dead_letter)
+out_queue = ClosableQueue()
+in_queue.put(Request('보통 1', priority=1))
+in_queue.put(Request('만료됨', priority=0, deadline=now - 1))
+in_queue.put(Request('보통 2', priority=1))
+in_queue.put(Request('급함(마감 늦음)', priority=0, deadline=now + 60))
+in_queue.put(Request('급함(마감 빠름)', priority=0, deadline=now + 30))
+in_queue.put('속성 없는 원소')
+
+threads = start_threads(1, lambda item: item, in_queue, out_queue)
+stop_threads(in_queue, threads)
+print('처리 순서:', list(out_queue.queue))
+print('dead letter:', list(dead_letter.queue))
+print(f'dropped={in_queue.dropped}, late={in_queue.late}')
+assert (in_queue.dropped, in_queue.late) == (1, 0)
+
+# 기다리는 도중에 마감이 지난 원소가 들어와서 버려도 get은 처음 정한 timeout 안에 돌아온다
+slow_queue = DeadlineQueue()
+Timer(0.08, slow_queue.put, [Request('만료됨', deadline=0)]).start()
+start = time.monotonic()
+try:
+    slow_queue.get(timeout=0.1)
+except Empty:
+    pass
+waited = time.monotonic() - start
+assert waited < 0.15, waited
+assert (slow_queue.dropped, slow_queue.late) == (1, 0)
+
+# 처리 능력보다 많은 요청이 들어올 때 FIFO와 DeadlineQueue의 유효 처리량(goodput)을 비교한다
+# 유효 처리량은 마감 전에 처리를 끝낸 요청 수를 걸린 시간으로 나눈 값이다
+SERVICE_TIME = 0.004       # 작업자 4개면 초당 1000개를 처리할 수 있다
+URGENT_DEADLINE = 0.05
+NORMAL_DEADLINE = 0.25
+
+def run_overload(in_queue, rate, duration, workers=4, seed=1234):
+    finished = []  # (급한 요청 여부, 마감 전에 끝났는지)
+
+    def handle(request):
+        time.sleep(SERVICE_TIME)
+        finished.append((request.priority == 0, time.monotonic() <= request.deadline))
+        return request
+
+    done_queue = DeadlineQueue()
+    threads = start_threads(workers, handle, in_queue, done_queue)
+
+    rng = random.Random(seed)
+    start = time.monotonic()
+    sent = 0
+    while time.monotonic() - start < duration:
+        # 10ms마다 그동안 도착했어야 할 요청을 한꺼번에 넣는다
+        target = int((time.monotonic() - start) * rate)
+        for i in range(sent, target):
+            now = time.monotonic()
+            if rng.random() < 0.2:
+                request = Request(i, 0, now + URGENT_DEADLINE)
+            else:
+                request = Request(i, 1, now + NORMAL_DEADLINE)
+            in_queue.put(request)
+        sent = target
+        time.sleep(0.01)
+
+    stop_threads(in_queue, threads)
+    elapsed = time.monotonic() - start
+
+    # 마지막 큐의 late가 마감 뒤에 완료된 요청 수다
+    on_time = len(finished) - done_queue.late
+    urgent = [ok for is_urgent, ok in finished if is_urgent]
+    return dict(
+        sent=sent,
+        processed=len(finished),
+        on_time=on_time,
+        goodput=on_time / elapsed,
+        urgent_on_time=sum(urgent),
+        dropped=getattr(in_queue, 'dropped', 0),
+        late=done_queue.late,
+        elapsed=elapsed)
+
+def benchmark(rate, duration):
+    print(f'요청 {rate}개/초(처리 능력 1000개/초), {duration}초 동안')
+    for label, queue in [('FIFO', ClosableQueue()), ('DeadlineQueue', DeadlineQueue())]:
+        r = run_overload(queue, rate, duration)
+        print(f'  {label:>13}: 처리 {r["processed"]}/{r["sent"]}개, '
+              f'마감 전 완료 {r["on_time"]}개(급한 요청 {r["urgent_on_time"]}개), '
+              f'버림 {r["dropped"]}개, 늦음 {r["late"]}개, '
+              f'유효 처리량 {r["goodput"]:,.0f}개/초, {r["elapsed"]:.1f}초')
+
+def main():
+    benchmark(800, 2)
+    benchmark(1500, 2)
+    benchmark(3000, 2)
+
+if __name__ == '__main__':
+    main()
+
+# 처리 순서: [Request('급함(마감 빠름)'), Request('급함(마감 늦음)'), '속성 없는 원소', Request('보통 1'), Request('보통 2')]
+# dead letter: [Request('만료됨')]
+# dropped=1, late=0
+# 요청 800개/초(처리 능력 1000개/초), 2초 동안
+#            FIFO: 처리 1599/1599개, 마감 전 완료 1599개(급한 요청 308개), 버림 0개, 늦음 0개, 유효 처리량 796개/초, 2.0초
+#   DeadlineQueue: 처리 1592/1592개, 마감 전 완료 1592개(급한 요청 306개), 버림 0개, 늦음 0개, 유효 처리량 796개/초, 2.0초
+# 요청 1500개/초(처리 능력 1000개/초), 2초 동안
+#            FIFO: 처리 2988/2988개, 마감 전 완료 549개(급한 요청 31개), 버림 0개, 늦음 2439개, 유효 처리량 174개/초, 3.2초
+#   DeadlineQueue: 처리 2112/2986개, 마감 전 완료 1779개(급한 요청 578개), 버림 874개, 늦음 333개, 유효 처리량 793개/초, 2.2초
+# 요청 3000개/초(처리 능력 1000개/초), 2초 동안
+#            FIFO: 처리 5973/5973개, 마감 전 완료 293개(급한 요청 18개), 버림 0개, 늦음 5680개, 유효 처리량 47개/초, 6.3초
+#   DeadlineQueue: 처리 2032/5966개, 마감 전 완료 1649개(급한 요청 1151개), 버림 3934개, 늦음 383개, 유효 처리량 736개/초, 2.2초
+
+# 처리 능력 안에서는 두 큐가 똑같이 동작한다
+# 과부하가 걸리면 FIFO는 밀린 원소를 모두 처리하느라 대부분의 요청이 마감을 넘기고, 부하가 클수록 유효 처리량이 0에 가까워진다
+# DeadlineQueue는 이미 늦은 요청을 꺼내자마자 버리므로 처리 능력을 마감 안에 끝낼 수 있는 요청에만 쓴다
+# 급한 요청을 먼저 꺼내므로 급한 요청이 늘어날수록 그만큼 더 많이 제시간에 끝난다
+# 늦음으로 남은 요청은 꺼낼 때는 마감 전이었지만 처리하는 4ms 사이에 마감이 지난 것들이다
@@ -0,0 +1,331 @@
+# 메모리보다 큰 보드는 mmap으로 파일에 직접 매핑해서 다뤄라
+
+# Grid는 모든 셀을 파이썬 리스트에 담으므로 보드가 커지면 작업 머신의 메모리를 넘어선다
+# MappedGrid는 보드를 파일에 저장하고 mmap으로 매핑한다
+# 운영체제가 필요한 페이지만 메모리로 읽어 오므로, 파일 전체를 메모리에 복사하지 않고도 get/set을 사용할 수 있다
+
+# 파일 구조
+# - 고정 크기 헤더: 매직 바이트, 높이, 너비
+# - 셀 데이터: 행 우선 순서로 셀 하나당 1비트. 각 행은 바이트 경계에 맞춰 시작한다
+#   한 행 안에서는 0번 열이 첫 바이트의 최상위 비트다
+
+import mmap
+import os
+import random
+import struct
+import tempfile
+import time
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+MAGIC = b'LIFEGRID'
+HEADER = struct.Struct('>8sQQ')
+
+class MappedGrid:
+    def __init__(self, file, mapping, height, width, readonly):
+        self.file = file
+        self.mapping = mapping
+        self.height = height
+        self.width = width
+        self.readonly = readonly
+        self.row_bytes = (width + 7) // 8
+        self.padding = self.row_bytes * 8 - width
+
+    @classmethod
+    def create(cls, path, height, width):
+        file = open(path, 'w+b')
+        file.write(HEADER.pack(MAGIC, height, width))
+        file.truncate(HEADER.size + height * ((width + 7) // 8))
+        mapping = mmap.mmap(file.fileno(), 0)
+        return cls(file, mapping, height, width, readonly=False)
+
+    # readonly=True로 열면 ACCESS_READ로 매핑하므로 파일 내용을 복사하지 않고 읽기만 한다
+    @classmethod
+    def open(cls, path, readonly=True):
+        file = open(path, 'rb' if readonly else 'r+b')
+        access = mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE
+        mapping = mmap.mmap(file.fileno(), 0, access=access)
+        magic, height, width = HEADER.unpack(mapping[:HEADER.size])
+        if magic != MAGIC:
+            mapping.close()
+            file.close()
+            raise ValueError(f'보드 파일이 아닙니다: {path}')
+        return cls(file, mapping, height, width, readonly)
+
+    def offset(self, y, x):
+        y %= self.height
+        x %= self.width
+        return HEADER.size + y * self.row_bytes + x // 8, 0x80 >> (x % 8)
+
+    def get(self, y, x):
+        index, bit = self.offset(y, x)
+        return ALIVE if self.mapping[index] & bit else EMPTY
+
+    def set(self, y, x, state):
+        if self.readonly:
+            raise TypeError('읽기 전용으로 연 보드입니다')
+        index, bit = self.offset(y, x)
+        if state == ALIVE:
+            self.mapping[index] |= bit
+        else:
+            self.mapping[index] &= ~bit & 0xFF
+
+    # 한 행 전체를 정수 하나로 읽고 쓴다. 0번 열이 가장 높은 비트다
+    def read_row(self, y):
+        start = HEADER.size + y * self.row_bytes
+        value = int.from_bytes(
+            self.mapping[start:start + self.row_bytes], 'big')
+        return value >> self.padding
+
+    def write_row(self, y, value):
+        start = HEADER.size + y * self.row_bytes
+        data = (value << self.padding).to_bytes(self.row_bytes, 'big')
+        self.mapping[start:start + self.row_bytes] = data
+
+    def __str__(self):
+        lines = []
+        for y in range(self.height):
+            bits = format(self.read_row(y), f'0{self.width}b')
+            lines.append(bits.replace('1', ALIVE).replace('0', EMPTY) + '\n')
+        return ''.join(lines)
+
+    def flush(self):
+        if not self.readonly:
+            self.mapping.flush()
+
+    def close(self):
+        self.flush()
+        self.mapping.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Better_Way56_3과 같은 방식으로 행 전체의 다음 세대를 비트 연산으로 한 번에 계산한다
+def next_row(above, row, below, width, mask):
+    def shifted(value):
+        west = (value >> 1) | ((value & 1) << (width - 1))
+        east = ((value << 1) & mask) | (value >> (width - 1))
+        return west, east
+
+    neighbors = (above, *shifted(above), *shifted(row), below, *shifted(below))
+    ones = twos = fours = 0
+    for value in neighbors:
+        carry = ones & value
+        ones ^= value
+        carry2 = twos & carry
+        twos ^= carry
+        fours ^= carry2
+    return twos & ~fours & (ones | row) & mask
+
+# 원본 파일을 stripe_rows 행씩 읽어서 다음 세대를 다른 파일에 쓴다
+# 어떤 줄무늬(stripe)를 계산할 때는 위아래 줄무늬의 경계 행이 필요하므로,
+# 메모리에는 이전/현재/다음 줄무늬 세 개만 들고 있으면 된다
+def simulate_mapped(source_path, target_path, stripe_rows=1024):
+    with MappedGrid.open(source_path) as source, \
+            MappedGrid.create(
+                target_path, source.height, source.width) as target:
+        height = source.height
+        width = source.width
+        mask = (1 << width) - 1
+
+        def read_stripe(index):
+            start = index * stripe_rows
+            end = min(start + stripe_rows, height)
+            return [source.read_row(y) for y in range(start, end)]
+
+        stripe_count = (height + stripe_rows - 1) // stripe_rows
+        previous = read_stripe(stripe_count - 1)  # 토러스이므로 첫 줄무늬의 위는 마지막 줄무늬다
+        current = read_stripe(0)
+        for index in range(stripe_count):
+            following = read_stripe((index + 1) % stripe_count)
+            rows = [previous[-1]] + current + [following[0]]
+            start = index * stripe_rows
+            for i in range(len(current)):
+                target.write_row(start + i, next_row(
+                    rows[i], rows[i + 1], rows[i + 2], width, mask))
+            previous, current = current, following
+
+def write_grid(path, grid):
+    with MappedGrid.create(path, grid.height, grid.width) as mapped:
+        for y, row in enumerate(grid.rows):
+            for x, cell in enumerate(row):
+                if cell == ALIVE:
+                    mapped.set(y, x, ALIVE)
+
+def random_grid(height, width, seed=1234):
+    rng = random.Random(seed)
+    grid = Grid(height, width)
+    for y in range(height):
+        for x in range(width):
+            if rng.random() < 0.3:
+                grid.set(y, x, ALIVE)
+    return grid
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    paths = [os.path.join(tmpdir, f'gen{i}.grid') for i in range(2)]
+
+    grid = Grid(5, 9)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+    write_grid(paths[0], grid)
+
+    columns = ColumnPrinter()
+    for i in range(5):
+        with MappedGrid.open(paths[i % 2]) as mapped:
+            columns.append(str(mapped))
+        simulate_mapped(paths[i % 2], paths[(i + 1) % 2], stripe_rows=2)
+    print(columns)
+
+    # 줄무늬 크기와 관계없이 simulate와 결과가 같은지 확인한다
+    expected = random_grid(37, 45)
+    for stripe_rows in (1, 5, 16, 100):
+        write_grid(paths[0], random_grid(37, 45))
+        for i in range(3):
+            simulate_mapped(paths[i % 2], paths[(i + 1) % 2], stripe_rows)
+        with MappedGrid.open(paths[1]) as mapped:
+            actual = str(mapped)
+        if stripe_rows == 1:
+            for _ in range(3):
+                expected = simulate(expected)
+        assert actual == str(expected), stripe_rows
+
+    # 읽기 전용으로 연 보드에는 쓸 수 없다
+    with MappedGrid.open(paths[1]) as mapped:
+        try:
+            mapped.set(0, 0, ALIVE)
+        except TypeError as e:
+            print('예상대로 오류 발생:', e)
+        else:
+            assert False
+
+def benchmark(size, stripe_rows):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, 'source.grid')
+        target = os.path.join(tmpdir, 'target.grid')
+        rng = random.Random(1234)
+        with MappedGrid.create(source, size, size) as mapped:
+            for y in range(size):
+                mapped.write_row(y, rng.getrandbits(size))
+
+        start = time.perf_counter()
+        simulate_mapped(source, target, stripe_rows)
+        elapsed = time.perf_counter() - start
+        file_size = os.path.getsize(target)
+
+    print(f'{size:,}x{size:,}: 파일 {file_size / 2**20:,.1f}MB, '
+          f'한 세대 {elapsed:.2f}초 '
+          f'(메모리에 올린 줄무늬 최대 3개 x {stripe_rows}행)')
+
+def main():
+    benchmark(1_000, 256)
+    benchmark(10_000, 1024)
+    benchmark(30_000, 1024)
+
+if __name__ == '__main__':
+    main()
+
+# 1,000x1,000: 파일 0.1MB, 한 세대 0.01초 (메모리에 올린 줄무늬 최대 3개 x 256행)
+# 10,000x10,000: 파일 11.9MB, 한 세대 0.37초 (메모리에 올린 줄무늬 최대 3개 x 1024행)
+# 30,000x30,000: 파일 107.3MB, 한 세대 1.93초 (메모리에 올린 줄무늬 최대 3개 x 1024행)
+
+# 30000x30000 보드를 Grid로 만들면 리스트만으로 7GB가 넘지만, 파일로는 셀당 1비트라 107MB다
+# simulate_mapped가 한 번에 들고 있는 데이터는 줄무늬 세 개(이 경우 약 11MB)뿐이므로,
+# 보드가 아무리 커져도 stripe_rows만 조절하면 메모리 사용량을 일정하게 유지할 수 있다
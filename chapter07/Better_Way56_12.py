@@ -0,0 +1,264 @@
+# 이웃 좌표는 보드 크기마다 한 번만 계산해 두고, 가장자리 셀만 감싸기를 처리하라
+
+# Grid.get(y, x)는 호출될 때마다 y % self.height와 x % self.width를 계산한다
+# count_neighbors는 셀마다 get을 8번 호출하므로, 한 세대에 셀 하나당 나머지 연산 16번과 메서드 호출 8번이 든다
+# 하지만 보드를 감싸야(wrap) 하는 셀은 가장자리에 있는 셀뿐이다
+
+# neighbor_tables는 행과 열마다 위/아래, 왼쪽/오른쪽 이웃의 인덱스를 미리 계산한 배열을 돌려준다
+# simulate_indexed는 행 단위로 위/아래 행 리스트를 한 번만 찾아 두고,
+# 안쪽 열은 x - 1, x + 1로 바로 읽으며, 첫 열과 마지막 열만 배열을 사용한다
+# wrap=False로 지정하면 보드 바깥을 항상 죽은 셀로 보는 유한한(토러스가 아닌) 보드가 된다
+
+import functools
+import random
+import time
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+# 보드 크기별로 한 번만 만들고 계속 재사용한다
+# 유한한 보드에서는 바깥을 가리키는 이웃 인덱스가 None이다
+@functools.lru_cache(maxsize=None)
+def neighbor_tables(height, width, wrap=True):
+    def offsets(length):
+        before = list(range(-1, length - 1))
+        after = list(range(1, length + 1))
+        if wrap:
+            before[0] = length - 1
+            after[-1] = 0
+        else:
+            before[0] = None
+            after[-1] = None
+        return tuple(before), tuple(after)
+
+    up, down = offsets(height)
+    left, right = offsets(width)
+    return up, down, left, right
+
+# 안쪽 셀은 위/아래 행 리스트와 x - 1, x + 1로 이웃 8개를 바로 읽는다
+def count_neighbors_interior(above, row, below, x):
+    west = x - 1
+    east = x + 1
+    return (above[west] + above[x] + above[east] +
+            row[west] + row[east] +
+            below[west] + below[x] + below[east]).count(ALIVE)
+
+# 첫 열과 마지막 열은 배열에서 이웃 열을 찾고, 보드 바깥(None)은 건너뛴다
+def count_neighbors_border(above, row, below, x, west, east):
+    cells = above[x] + below[x]
+    if west is not None:
+        cells += above[west] + row[west] + below[west]
+    if east is not None:
+        cells += above[east] + row[east] + below[east]
+    return cells.count(ALIVE)
+
+def simulate_indexed(grid, wrap=True):
+    height = grid.height
+    width = grid.width
+    up, down, left, right = neighbor_tables(height, width, wrap)
+    rows = grid.rows
+    dead_row = [EMPTY] * width
+    border = sorted({0, width - 1})
+
+    next_grid = Grid(height, width)
+    for y in range(height):
+        row = rows[y]
+        above = dead_row if up[y] is None else rows[up[y]]
+        below = dead_row if down[y] is None else rows[down[y]]
+        next_row = next_grid.rows[y]
+        for x in range(1, width - 1):
+            neighbors = count_neighbors_interior(above, row, below, x)
+            next_row[x] = game_logic(row[x], neighbors)
+        for x in border:
+            neighbors = count_neighbors_border(
+                above, row, below, x, left[x], right[x])
+            next_row[x] = game_logic(row[x], neighbors)
+    return next_grid
+
+grid = Grid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+for i in range(5):
+    columns.append(str(grid))
+    grid = simulate_indexed(grid)
+
+print(columns)
+
+# 유한한 보드에서는 글라이더가 모서리에 부딪혀 블록(2x2)으로 굳는다(4세대마다 출력)
+grid = Grid(5, 5)
+for y, x in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+    grid.set(y, x, ALIVE)
+
+columns = ColumnPrinter()
+for i in range(17):
+    if i % 4 == 0:
+        columns.append(str(grid))
+    grid = simulate_indexed(grid, wrap=False)
+
+print(columns)
+
+def random_grid(height, width, seed=1234):
+    rng = random.Random(seed)
+    grid = Grid(height, width)
+    for y in range(height):
+        for x in range(width):
+            if rng.random() < 0.3:
+                grid.set(y, x, ALIVE)
+    return grid
+
+# 토러스 보드에서는 simulate와 결과가 같아야 한다. 폭이나 높이가 1, 2인 보드도 확인한다
+for height, width in [(1, 1), (1, 5), (2, 2), (5, 1), (37, 45)]:
+    expected = random_grid(height, width)
+    actual = random_grid(height, width)
+    for i in range(5):
+        expected = simulate(expected)
+        actual = simulate_indexed(actual)
+        assert str(expected) == str(actual), (height, width, i)
+
+# 유한한 보드는 사방에 죽은 셀을 한 줄씩 덧댄 토러스 보드에서 한 세대를 계산한 것과 같다
+def step_bounded_reference(grid):
+    padded = Grid(grid.height + 2, grid.width + 2)
+    for y, row in enumerate(grid.rows):
+        padded.rows[y + 1][1:-1] = row
+    padded = simulate(padded)
+    result = Grid(grid.height, grid.width)
+    result.rows = [row[1:-1] for row in padded.rows[1:-1]]
+    return result
+
+for height, width in [(1, 1), (2, 3), (37, 45)]:
+    expected = random_grid(height, width)
+    actual = random_grid(height, width)
+    for i in range(5):
+        expected = step_bounded_reference(expected)
+        actual = simulate_indexed(actual, wrap=False)
+        assert str(expected) == str(actual), (height, width, i)
+
+def benchmark(size):
+    grid = random_grid(size, size)
+
+    start = time.perf_counter()
+    expected = simulate(grid)
+    simulate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = simulate_indexed(grid)
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulate_indexed(grid, wrap=False)
+    bounded_time = time.perf_counter() - start
+
+    assert str(expected) == str(actual)
+    print(f'{size}x{size}: simulate {simulate_time:.3f}초, '
+          f'simulate_indexed {indexed_time:.3f}초 '
+          f'({simulate_time / indexed_time:.1f}배), '
+          f'wrap=False {bounded_time:.3f}초')
+
+def main():
+    for size in (100, 300, 1000):
+        benchmark(size)
+
+if __name__ == '__main__':
+    main()
+
+# 100x100: simulate 0.021초, simulate_indexed 0.007초 (2.9배), wrap=False 0.008초
+# 300x300: simulate 0.208초, simulate_indexed 0.082초 (2.5배), wrap=False 0.119초
+# 1000x1000: simulate 3.179초, simulate_indexed 1.195초 (2.7배), wrap=False 1.224초
+
+# 나머지 연산이 사라진 것보다 get 메서드 호출 8번이 리스트 인덱싱으로 바뀐 효과가 더 크다
+# 가장자리 셀은 2 * (높이 + 너비)개뿐이므로 보드가 커질수록 느린 경로의 비중은 무시할 만하다
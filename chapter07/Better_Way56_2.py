@@ -0,0 +1,233 @@
+# 생명 게임의 세대 계산을 NumPy 배열로 한꺼번에 처리하라
+
+# Better_Way56의 simulate는 셀마다 step_cell -> count_neighbors를 호출한다
+# 셀 하나를 계산할 때마다 get 메서드 호출 8번과 나머지(%) 연산 16번이 일어나므로
+# 한 세대에 몇 천 개 정도의 셀만 처리해도 느려진다
+
+# 그리드 전체를 2차원 NumPy 배열에 담으면 이웃 수를 셀 단위가 아니라 배열 단위로 셀 수 있다
+# np.roll로 배열을 8방향으로 민 다음 더하면 토러스(양 끝이 이어진) 보드의 이웃 수가 한 번에 계산된다
+
+import time
+
+import numpy as np
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+# NumpyGrid는 Grid와 똑같이 get, set, __str__을 제공하므로 기존 코드에 그대로 끼워 넣을 수 있다
+# 내부적으로는 셀마다 문자열 대신 uint8 값(살아 있으면 1, 비어 있으면 0)을 저장한다
+class NumpyGrid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.cells = np.zeros((height, width), dtype=np.uint8)
+
+    def get(self, y, x):
+        if self.cells[y % self.height, x % self.width]:
+            return ALIVE
+        return EMPTY
+
+    def set(self, y, x, state):
+        self.cells[y % self.height, x % self.width] = (state == ALIVE)
+
+    def __str__(self):
+        # 0/1 배열을 문자 배열로 바꾼 뒤 행마다 한 번씩만 join 한다
+        chars = np.where(self.cells, ALIVE, EMPTY)
+        return ''.join(''.join(row) + '\n' for row in chars)
+
+    @classmethod
+    def from_grid(cls, grid):
+        result = cls(grid.height, grid.width)
+        for y in range(grid.height):
+            for x in range(grid.width):
+                result.set(y, x, grid.get(y, x))
+        return result
+
+# 8방향으로 민 배열을 더하면 모든 셀의 이웃 수가 한 번에 나온다
+# np.roll은 배열 끝에서 밀려난 값을 반대쪽 끝으로 돌려 보내므로 토러스 보드의 나머지 연산과 같은 효과를 낸다
+def count_neighbors_numpy(cells):
+    counts = np.zeros(cells.shape, dtype=np.uint8)
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dy == 0 and dx == 0:
+                continue
+            counts += np.roll(cells, (dy, dx), axis=(0, 1))
+    return counts
+
+# game_logic의 규칙을 배열 전체에 대한 불리언 연산으로 옮긴 것이다
+# 살아 있는 셀은 이웃이 2개나 3개일 때만 살아남고, 빈 셀은 이웃이 정확히 3개일 때 살아난다
+def game_logic_numpy(cells, neighbors):
+    survive = (cells == 1) & ((neighbors == 2) | (neighbors == 3))
+    born = (cells == 0) & (neighbors == 3)
+    return (survive | born).astype(np.uint8)
+
+def simulate_numpy(grid):
+    next_grid = NumpyGrid(grid.height, grid.width)
+    neighbors = count_neighbors_numpy(grid.cells)
+    next_grid.cells = game_logic_numpy(grid.cells, neighbors)
+    return next_grid
+
+grid = NumpyGrid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+for i in range(5):
+    columns.append(str(grid))
+    grid = simulate_numpy(grid)
+
+print(columns)
+
+# 같은 글라이더를 Better_Way56의 simulate로 돌린 결과와 세대별로 똑같은지 확인한다
+expected = Grid(5, 9)
+actual = NumpyGrid(5, 9)
+for y, x in [(0, 3), (1, 4), (2, 2), (2, 3), (2, 4)]:
+    expected.set(y, x, ALIVE)
+    actual.set(y, x, ALIVE)
+
+for i in range(20):
+    assert str(expected) == str(actual), i
+    expected = simulate(expected)
+    actual = simulate_numpy(actual)
+
+# NumpyGrid는 get/set을 그대로 제공하므로 기존 simulate 함수에도 넘길 수 있다
+# (이 경우 결과는 simulate가 만드는 평범한 Grid가 된다)
+assert str(simulate(NumpyGrid.from_grid(expected))) == str(simulate(expected))
+
+# 순수 파이썬 simulate와 simulate_numpy의 한 세대 계산 시간을 비교한다
+# 5000x5000 그리드에서 순수 파이썬 버전은 한 세대에 1분 넘게 걸리므로 한 번만 실행한다
+def random_cells(height, width, seed=1234):
+    rng = np.random.default_rng(seed)
+    return (rng.random((height, width)) < 0.3).astype(np.uint8)
+
+def benchmark(height, width):
+    cells = random_cells(height, width)
+
+    numpy_grid = NumpyGrid(height, width)
+    numpy_grid.cells = cells
+
+    python_grid = Grid(height, width)
+    python_grid.rows = [
+        [ALIVE if cell else EMPTY for cell in row]
+        for row in cells.tolist()]
+
+    start = time.perf_counter()
+    simulate(python_grid)
+    python_time = time.perf_counter() - start
+
+    repeat = 10
+    start = time.perf_counter()
+    for _ in range(repeat):
+        simulate_numpy(numpy_grid)
+    numpy_time = (time.perf_counter() - start) / repeat
+
+    speedup = python_time / numpy_time
+    print(f'{height}x{width}: 파이썬 {python_time:.4f}초, '
+          f'NumPy {numpy_time:.4f}초, {speedup:,.0f}배 빠름')
+
+def main():
+    for size in (100, 1000, 5000):
+        benchmark(size, size)
+
+if __name__ == '__main__':
+    main()
+
+# 100x100: 파이썬 0.0296초, NumPy 0.0002초, 130배 빠름
+# 1000x1000: 파이썬 2.9988초, NumPy 0.0036초, 838배 빠름
+# 5000x5000: 파이썬 85.3698초, NumPy 0.1390초, 614배 빠름
+
+# NumPy 버전은 세대마다 새 배열을 만들 뿐 셀 단위로 파이썬 코드를 실행하지 않는다
+# 셀마다 I/O를 해야 한다면 이 방식은 쓸 수 없지만, 순수 계산만 필요하다면 배열 연산이 가장 빠르다
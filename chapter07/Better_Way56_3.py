@@ -0,0 +1,259 @@
+# 셀 하나를 비트 하나로 저장해서 그리드의 메모리 사용량을 줄여라
+
+# Better_Way56~60의 Grid는 셀마다 '*'나 '-' 문자열에 대한 참조를 리스트에 저장한다
+# 64비트 파이썬에서 참조 하나는 8바이트이므로 20000x20000 보드는 리스트만으로 3GB가 넘는다
+
+# 파이썬의 int는 크기 제한이 없으므로 한 행 전체를 정수 하나(비트보드)에 담을 수 있다
+# x 번째 비트가 1이면 (y, x) 셀이 살아 있는 것이다
+# 이렇게 하면 셀당 1비트만 사용하고, 이웃 수도 비트 연산으로 행 단위로 한꺼번에 계산할 수 있다
+
+import time
+import tracemalloc
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+# PackedGrid는 __slots__를 사용해 인스턴스 딕셔너리도 만들지 않는다
+# get/set/__str__은 Grid와 같으므로 simulate나 ColumnPrinter에 그대로 넘길 수 있다
+class PackedGrid:
+    __slots__ = ('height', 'width', 'mask', 'rows')
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.mask = (1 << width) - 1
+        self.rows = [0] * height
+
+    def get(self, y, x):
+        if (self.rows[y % self.height] >> (x % self.width)) & 1:
+            return ALIVE
+        return EMPTY
+
+    def set(self, y, x, state):
+        y %= self.height
+        bit = 1 << (x % self.width)
+        if state == ALIVE:
+            self.rows[y] |= bit
+        else:
+            self.rows[y] &= ~bit
+
+    def __str__(self):
+        lines = []
+        for row in self.rows:
+            # 0번 비트가 맨 왼쪽 열이 되도록 이진 문자열을 뒤집는다
+            bits = format(row, f'0{self.width}b')[::-1]
+            lines.append(bits.replace('1', ALIVE).replace('0', EMPTY))
+            lines.append('\n')
+        return ''.join(lines)
+
+# 행 전체를 한 칸씩 좌우로 회전시키면 각 비트 자리에 서쪽/동쪽 이웃 값이 온다
+# 가장자리에서 밀려난 비트는 반대쪽으로 돌려 보내서 토러스 보드를 흉내 낸다
+def west_of(row, width, mask):
+    return ((row << 1) & mask) | (row >> (width - 1))
+
+def east_of(row, width, mask):
+    return (row >> 1) | ((row & 1) << (width - 1))
+
+# 이웃 8개의 비트마스크를 비트 단위 덧셈기로 더한다
+# ones, twos, fours는 각 셀의 이웃 수를 이진수로 나타낸 자릿수다
+# 이웃이 8개인 경우는 0으로 넘쳐 버리지만, 규칙은 2와 3만 구분하면 되므로 문제가 없다
+def next_row(above, row, below, width, mask):
+    neighbors = (
+        above, west_of(above, width, mask), east_of(above, width, mask),
+        west_of(row, width, mask), east_of(row, width, mask),
+        below, west_of(below, width, mask), east_of(below, width, mask),
+    )
+    ones = twos = fours = 0
+    for value in neighbors:
+        carry = ones & value
+        ones ^= value
+        carry2 = twos & carry
+        twos ^= carry
+        fours ^= carry2
+    # 이웃이 3개(011)이거나, 살아 있으면서 이웃이 2개(010)면 다음 세대에 살아 있다
+    return twos & ~fours & (ones | row) & mask
+
+def simulate_packed(grid):
+    next_grid = PackedGrid(grid.height, grid.width)
+    rows = grid.rows
+    height = grid.height
+    for y in range(height):
+        above = rows[(y - 1) % height]
+        below = rows[(y + 1) % height]
+        next_grid.rows[y] = next_row(
+            above, rows[y], below, grid.width, grid.mask)
+    return next_grid
+
+grid = PackedGrid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+for i in range(5):
+    columns.append(str(grid))
+    grid = simulate_packed(grid)
+
+print(columns)
+
+# 같은 글라이더를 Grid와 simulate로 돌린 결과와 세대별로 똑같은지 확인한다
+expected = Grid(5, 9)
+actual = PackedGrid(5, 9)
+for y, x in [(0, 3), (1, 4), (2, 2), (2, 3), (2, 4)]:
+    expected.set(y, x, ALIVE)
+    actual.set(y, x, ALIVE)
+
+for i in range(20):
+    assert str(expected) == str(actual), i
+    expected = simulate(expected)
+    actual = simulate_packed(actual)
+
+# tracemalloc으로 같은 크기의 Grid와 PackedGrid가 차지하는 메모리를 잰다
+def measure(factory, height, width):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    grid = factory(height, width)
+    # 빈 그리드는 같은 0을 공유하므로 모든 행을 실제 크기의 정수로 채운다
+    if isinstance(grid, PackedGrid):
+        grid.rows = [grid.mask ^ y for y in range(height)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before
+
+def memory_report(height, width):
+    grid_bytes = measure(Grid, height, width)
+    packed_bytes = measure(PackedGrid, height, width)
+    print(f'{height}x{width}: Grid {grid_bytes / 2**10:,.0f}KB, '
+          f'PackedGrid {packed_bytes / 2**10:,.0f}KB, '
+          f'{grid_bytes / packed_bytes:.0f}배 작음')
+
+def speed_report(height, width):
+    packed = PackedGrid(height, width)
+    for y in range(height):
+        for x in range(0, width, 3):
+            packed.set(y, x + y, ALIVE)
+
+    plain = Grid(height, width)
+    plain.rows = [list(line) for line in str(packed).splitlines()]
+
+    start = time.perf_counter()
+    expected = simulate(plain)
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = simulate_packed(packed)
+    packed_time = time.perf_counter() - start
+
+    assert str(expected) == str(actual)
+
+    print(f'{height}x{width}: simulate {python_time:.4f}초, '
+          f'simulate_packed {packed_time:.4f}초')
+
+def main():
+    for size in (100, 1000, 5000):
+        memory_report(size, size)
+    speed_report(1000, 1000)
+
+if __name__ == '__main__':
+    main()
+
+# 100x100: Grid 84KB, PackedGrid 5KB, 17배 작음
+# 1000x1000: Grid 7,872KB, PackedGrid 165KB, 48배 작음
+# 5000x5000: Grid 195,623KB, PackedGrid 3,420KB, 57배 작음
+# 1000x1000: simulate 3.3335초, simulate_packed 0.0060초
+
+# 이 비율대로라면 20000x20000 보드도 PackedGrid로는 50MB 정도면 충분하다
+# 다만 셀 하나를 읽고 쓰는 get/set은 정수 전체를 새로 만들기 때문에 오히려 느리다
+# 보드 전체를 다룰 때는 simulate_packed처럼 행 단위 비트 연산을 사용해야 한다
@@ -0,0 +1,220 @@
+# 바뀐 셀 주변만 다시 계산해서 드문드문한 보드를 빠르게 시뮬레이션하라
+
+# simulate는 세대마다 그리드의 모든 셀을 다시 방문한다
+# 하지만 실제 보드는 대부분 비어 있거나 변하지 않는 영역이므로 이런 방문은 대부분 헛수고다
+
+# 어떤 셀의 다음 상태는 자기 자신과 이웃 8개의 상태로만 결정된다
+# 따라서 직전 세대에 바뀐 셀이 없다면 그 주변 셀의 상태도 바뀔 수 없다
+# 직전 세대에 바뀐 셀과 그 이웃만 다시 계산하면 비용이 보드 넓이가 아니라 활동량에 비례하게 된다
+
+import time
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+# 바뀐 셀 집합에서 다시 계산해야 할 후보 셀(자기 자신과 이웃 8개)을 구한다
+# 좌표를 미리 나머지 연산으로 정규화해 두어야 같은 셀이 집합에 두 번 들어가지 않는다
+def cells_to_visit(changed, height, width):
+    visit = set()
+    for y, x in changed:
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                visit.add(((y + dy) % height, (x + dx) % width))
+    return visit
+
+# 후보 셀만 game_logic으로 계산한다
+# 모든 후보의 다음 상태를 먼저 구한 뒤에 그리드를 고치므로 새 Grid를 만들 필요 없이 제자리에서 갱신할 수 있다
+def step_active(grid, changed):
+    born = []
+    died = []
+    for y, x in cells_to_visit(changed, grid.height, grid.width):
+        state = grid.get(y, x)
+        neighbors = count_neighbors(y, x, grid.get)
+        next_state = game_logic(state, neighbors)
+        if next_state != state:
+            if next_state == ALIVE:
+                born.append((y, x))
+            else:
+                died.append((y, x))
+
+    for y, x in born:
+        grid.set(y, x, ALIVE)
+    for y, x in died:
+        grid.set(y, x, EMPTY)
+
+    return born, died
+
+# 세대마다 (태어난 셀, 죽은 셀) 목록을 돌려주는 제너레이터다
+# 첫 세대에는 어떤 셀이 바뀔지 모르므로 모든 셀을 방문하고, 그 뒤로는 바뀐 셀 주변만 방문한다
+# game_logic을 그대로 사용하므로 결과는 simulate와 똑같다
+# 그리드는 제자리에서 바뀌므로 각 세대의 상태는 제너레이터가 값을 내놓은 직후의 grid로 확인할 수 있다
+def generations(grid):
+    changed = [
+        (y, x)
+        for y in range(grid.height)
+        for x in range(grid.width)]
+    while True:
+        born, died = step_active(grid, changed)
+        yield born, died
+        changed = born + died
+
+grid = Grid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+columns.append(str(grid))
+it = generations(grid)
+for i in range(4):
+    born, died = next(it)
+    print(f'{i + 1} 세대: 태어남 {sorted(born)}, 죽음 {sorted(died)}')
+    columns.append(str(grid))
+
+print(columns)
+
+# 같은 글라이더를 simulate로 돌린 결과와 세대별로 똑같은지 확인한다
+expected = Grid(5, 9)
+actual = Grid(5, 9)
+for y, x in [(0, 3), (1, 4), (2, 2), (2, 3), (2, 4)]:
+    expected.set(y, x, ALIVE)
+    actual.set(y, x, ALIVE)
+
+it = generations(actual)
+for i in range(20):
+    expected = simulate(expected)
+    next(it)
+    assert str(expected) == str(actual), i
+
+# 넓은 보드에 글라이더 몇 개만 있는 경우, 세대를 거듭할수록 차이가 커진다
+def make_sparse_grid(size, gliders):
+    grid = Grid(size, size)
+    for i in range(gliders):
+        top = i * size // gliders
+        left = i * size // gliders
+        for y, x in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+            grid.set(top + y, left + x, ALIVE)
+    return grid
+
+def benchmark(size, gliders, steps):
+    grid = make_sparse_grid(size, gliders)
+    start = time.perf_counter()
+    for _ in range(steps):
+        grid = simulate(grid)
+    full_time = time.perf_counter() - start
+
+    active_grid = make_sparse_grid(size, gliders)
+    it = generations(active_grid)
+    start = time.perf_counter()
+    for _ in range(steps):
+        next(it)
+    active_time = time.perf_counter() - start
+
+    assert str(grid) == str(active_grid)
+    print(f'{size}x{size}, 글라이더 {gliders}개, {steps} 세대: '
+          f'simulate {full_time:.3f}초, generations {active_time:.3f}초')
+
+def main():
+    benchmark(100, 4, 100)
+    benchmark(300, 8, 50)
+
+if __name__ == '__main__':
+    main()
+
+# 100x100, 글라이더 4개, 100 세대: simulate 2.934초, generations 0.091초
+# 300x300, 글라이더 8개, 50 세대: simulate 11.971초, generations 0.696초
+
+# generations의 첫 세대는 모든 셀을 방문하므로 simulate와 비용이 같다
+# 그 이후에는 보드 크기와 관계없이 글라이더 주변 몇십 개의 셀만 계산한다
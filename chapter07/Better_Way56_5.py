@@ -0,0 +1,476 @@
+# 먼 미래의 세대가 필요하다면 HashLife로 결과를 메모이제이션하라
+
+# 지금까지 본 simulate는 아무리 빨라도 한 번에 한 세대씩 계산한다
+# 몇 천 세대 뒤의 상태가 필요하다면 그만큼 simulate를 반복해야 한다
+
+# HashLife는 보드를 사분 트리(quadtree)로 표현하고, 같은 모양의 노드는 하나의 객체로 공유한다(해시 콘싱)
+# 크기가 2**k인 노드의 가운데 절반이 2**(k-2) 세대 뒤에 어떻게 될지는 그 노드의 모양만으로 결정되므로
+# 한 번 계산한 결과를 노드별로 캐시해 두면 반복되는 패턴은 다시 계산할 필요가 없다
+# 이렇게 하면 한 번의 호출로 2**k 세대를 건너뛸 수 있다
+
+# 주의: HashLife는 끝이 없는 평면을 다룬다
+# Grid처럼 가장자리가 반대쪽과 이어지는 토러스 보드가 아니므로,
+# 패턴이 Grid의 가장자리에 닿으면 simulate와 결과가 달라진다
+
+from collections import OrderedDict
+import time
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+# 레벨이 k인 노드는 2**k x 2**k 크기의 정사각형 영역을 나타낸다
+# 레벨 0 노드는 셀 하나이고, 그 위의 노드는 네 개의 자식(북서, 북동, 남서, 남동)으로 이뤄진다
+# 노드는 한 번 만들면 바꾸지 않으므로 같은 모양의 노드를 여러 곳에서 공유해도 안전하다
+class Node:
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population')
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+OFF = Node(0, None, None, None, None, 0)
+ON = Node(0, None, None, None, None, 1)
+
+# HashLife는 노드 테이블과 결과 캐시 두 가지를 관리한다
+# max_nodes: 노드 테이블이 이 크기를 넘으면 step 호출 전에 현재 보드에서 쓰이지 않는 노드를 정리한다
+# max_results: 결과 캐시의 최대 크기
+# eviction: 결과 캐시가 가득 찼을 때 'lru'면 가장 오래 쓰지 않은 결과를 하나씩 버리고, 'clear'면 통째로 비운다
+class HashLife:
+    def __init__(self, max_nodes=1_000_000, max_results=1_000_000,
+                 eviction='lru'):
+        if eviction not in ('lru', 'clear'):
+            raise ValueError(f'알 수 없는 캐시 정책: {eviction}')
+        self.max_nodes = max_nodes
+        self.max_results = max_results
+        self.eviction = eviction
+        self.nodes = {}
+        self.results = OrderedDict()
+        self.empties = [OFF]
+        self.root = self.empty(3)
+        self.top = 0    # root 노드의 왼쪽 위 셀의 좌표
+        self.left = 0
+        self.generation = 0
+
+    # 같은 자식 네 개로 만든 노드는 항상 같은 객체를 돌려준다(해시 콘싱)
+    # 자식 노드가 이미 유일하므로 객체 자체를 키로 사용해도 된다
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None:
+            population = (
+                nw.population + ne.population +
+                sw.population + se.population)
+            node = Node(nw.level + 1, nw, ne, sw, se, population)
+            self.nodes[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self.empties) <= level:
+            e = self.empties[-1]
+            self.empties.append(self.join(e, e, e, e))
+        return self.empties[level]
+
+    # 노드를 빈 공간으로 둘러싸서 한 레벨 크게 만든다. 원래 노드는 가운데에 위치한다
+    def expand(self, node):
+        e = self.empty(node.level - 1)
+        return self.join(
+            self.join(e, e, e, node.nw),
+            self.join(e, e, node.ne, e),
+            self.join(e, node.sw, e, e),
+            self.join(node.se, e, e, e))
+
+    def center(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    # 4x4 노드의 가운데 2x2 셀이 한 세대 뒤에 어떻게 될지는 직접 계산한다
+    # 다른 시뮬레이터와 결과가 같도록 game_logic을 그대로 사용한다
+    def life_4x4(self, node):
+        cells = [[0] * 4 for _ in range(4)]
+        for qy, qx, quad in ((0, 0, node.nw), (0, 2, node.ne),
+                             (2, 0, node.sw), (2, 2, node.se)):
+            cells[qy][qx] = quad.nw.population
+            cells[qy][qx + 1] = quad.ne.population
+            cells[qy + 1][qx] = quad.sw.population
+            cells[qy + 1][qx + 1] = quad.se.population
+
+        def get(y, x):
+            return ALIVE if cells[y][x] else EMPTY
+
+        result = []
+        for y, x in ((1, 1), (1, 2), (2, 1), (2, 2)):
+            next_state = game_logic(get(y, x), count_neighbors(y, x, get))
+            result.append(ON if next_state == ALIVE else OFF)
+        return self.join(*result)
+
+    # 레벨 k 노드의 가운데 절반(레벨 k-1)을 2**j 세대 뒤로 진행한 결과를 돌려준다 (0 <= j <= k-2)
+    # 노드를 겹치는 아홉 개의 하위 노드로 나눈 뒤,
+    # j == k-2이면 두 번에 나눠 2**(j-1) 세대씩 진행하고, 그보다 작으면 한 번만 진행한다
+    def step_node(self, node, j):
+        if node.population == 0:
+            return self.empty(node.level - 1)
+
+        key = (node, j)
+        result = self.results.get(key)
+        if result is not None:
+            if self.eviction == 'lru':
+                self.results.move_to_end(key)
+            return result
+
+        if node.level == 2:
+            result = self.life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            n00 = nw
+            n01 = self.join(nw.ne, ne.nw, nw.se, ne.sw)
+            n02 = ne
+            n10 = self.join(nw.sw, nw.se, sw.nw, sw.ne)
+            n11 = self.join(nw.se, ne.sw, sw.ne, se.nw)
+            n12 = self.join(ne.sw, ne.se, se.nw, se.ne)
+            n20 = sw
+            n21 = self.join(sw.ne, se.nw, sw.se, se.sw)
+            n22 = se
+
+            if j == node.level - 2:
+                def first(sub):
+                    return self.step_node(sub, j - 1)
+                second = first
+            else:
+                first = self.center
+                def second(sub):
+                    return self.step_node(sub, j)
+
+            c00, c01, c02 = first(n00), first(n01), first(n02)
+            c10, c11, c12 = first(n10), first(n11), first(n12)
+            c20, c21, c22 = first(n20), first(n21), first(n22)
+
+            result = self.join(
+                second(self.join(c00, c01, c10, c11)),
+                second(self.join(c01, c02, c11, c12)),
+                second(self.join(c10, c11, c20, c21)),
+                second(self.join(c11, c12, c21, c22)))
+
+        self.results[key] = result
+        if len(self.results) > self.max_results:
+            if self.eviction == 'lru':
+                self.results.popitem(last=False)
+            else:
+                self.results.clear()
+        return result
+
+    # 살아 있는 셀이 root의 가운데 절반 안에만 있는지 확인한다
+    def is_padded(self, node):
+        return (
+            node.nw.population == node.nw.se.se.population and
+            node.ne.population == node.ne.sw.sw.population and
+            node.sw.population == node.sw.ne.ne.population and
+            node.se.population == node.se.nw.nw.population)
+
+    # 2**k 세대를 한 번에 진행한다
+    # 패턴은 한 세대에 최대 한 칸씩만 퍼질 수 있으므로, 충분히 여유 공간을 둘 때까지 root를 키운 다음 진행한다
+    def step(self, k):
+        self.collect_garbage()
+        root = self.root
+        while root.level < k + 2 or not self.is_padded(root):
+            half = 1 << (root.level - 1)
+            root = self.expand(root)
+            self.top -= half
+            self.left -= half
+
+        quarter = 1 << (root.level - 1)
+        root = self.expand(root)
+        self.top -= quarter
+        self.left -= quarter
+
+        self.root = self.step_node(root, k)
+        self.top += quarter
+        self.left += quarter
+        self.generation += 1 << k
+
+    # 원하는 세대 수를 2의 거듭제곱의 합으로 나눠 진행한다
+    def run(self, generations):
+        k = 0
+        while generations:
+            if generations & 1:
+                self.step(k)
+            generations >>= 1
+            k += 1
+
+    # 노드 테이블이 너무 커지면 현재 root에서 닿을 수 있는 노드만 남기고 모두 버린다
+    # 버린 노드를 키로 쓰는 결과 캐시도 함께 비운다
+    def collect_garbage(self):
+        if len(self.nodes) <= self.max_nodes:
+            return
+        live = {}
+        stack = [self.root] + self.empties[1:]
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key in live:
+                continue
+            live[key] = node
+            stack.extend(key)
+        self.nodes = live
+        self.results.clear()
+
+    # 살아 있는 셀의 (y, x) 좌표 목록으로부터 root 노드를 만든다
+    def set_cells(self, cells):
+        cells = list(cells)
+        if not cells:
+            self.root = self.empty(3)
+            self.top = self.left = 0
+            return
+        top = min(y for y, _ in cells)
+        left = min(x for _, x in cells)
+        extent = max(max(y - top, x - left) for y, x in cells) + 1
+        level = max(3, (extent - 1).bit_length())
+        self.root = self.build(level, top, left, cells)
+        self.top = top
+        self.left = left
+
+    def build(self, level, top, left, cells):
+        if not cells:
+            return self.empty(level)
+        if level == 0:
+            return ON
+        half = 1 << (level - 1)
+        quads = ([], [], [], [])
+        for y, x in cells:
+            index = (2 if y >= top + half else 0) + (1 if x >= left + half else 0)
+            quads[index].append((y, x))
+        return self.join(
+            self.build(level - 1, top, left, quads[0]),
+            self.build(level - 1, top, left + half, quads[1]),
+            self.build(level - 1, top + half, left, quads[2]),
+            self.build(level - 1, top + half, left + half, quads[3]))
+
+    def cells(self):
+        found = []
+        stack = [(self.root, self.top, self.left)]
+        while stack:
+            node, top, left = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                found.append((top, left))
+                continue
+            half = 1 << (node.level - 1)
+            stack.append((node.nw, top, left))
+            stack.append((node.ne, top, left + half))
+            stack.append((node.sw, top + half, left))
+            stack.append((node.se, top + half, left + half))
+        return found
+
+    # Grid의 (0, 0) 셀을 평면의 (0, 0) 좌표에 두고 살아 있는 셀을 옮겨 온다
+    @classmethod
+    def from_grid(cls, grid, **kwargs):
+        life = cls(**kwargs)
+        life.set_cells(
+            (y, x)
+            for y in range(grid.height)
+            for x in range(grid.width)
+            if grid.get(y, x) == ALIVE)
+        return life
+
+    # 평면에서 (top, left)부터 height x width 크기만큼 잘라 Grid로 돌려준다
+    def to_grid(self, height, width, top=0, left=0):
+        grid = Grid(height, width)
+        for y, x in self.cells():
+            if top <= y < top + height and left <= x < left + width:
+                grid.set(y - top, x - left, ALIVE)
+        return grid
+
+grid = Grid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+# 토러스 가장자리에 닿기 전까지는 simulate와 결과가 같다
+life = HashLife.from_grid(grid)
+columns = ColumnPrinter()
+for i in range(3):
+    columns.append(str(life.to_grid(5, 9)))
+    assert str(life.to_grid(5, 9)) == str(grid)
+    life.run(1)
+    grid = simulate(grid)
+
+print(columns)
+
+# 글라이더는 4세대마다 오른쪽 아래로 한 칸 움직인다
+# 2**10 세대를 한 번에 건너뛰면 글라이더는 256칸 떨어진 곳에 같은 모양으로 나타난다
+life = HashLife()
+life.set_cells([(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)])
+life.step(10)
+print(life.generation, '세대:', sorted(life.cells()))
+assert sorted(life.cells()) == [
+    (256, 257), (257, 258), (258, 256), (258, 257), (258, 258)]
+
+# 가장자리까지 닿지 않을 만큼 큰 Grid에서 simulate를 반복한 결과와 비교한다
+def r_pentomino(grid, top, left):
+    for y, x in [(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)]:
+        grid.set(top + y, left + x, ALIVE)
+
+expected = Grid(64, 64)
+r_pentomino(expected, 30, 30)
+life = HashLife.from_grid(expected)
+for _ in range(16):
+    expected = simulate(expected)
+life.step(4)
+assert str(life.to_grid(64, 64)) == str(expected)
+
+# 캐시를 아주 작게 잡아도 결과는 같고, 다시 계산하는 양만 늘어난다
+for eviction in ('lru', 'clear'):
+    small = HashLife(max_nodes=2_000, max_results=500, eviction=eviction)
+    r_pentomino_cells = [(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)]
+    small.set_cells(r_pentomino_cells)
+    small.run(200)
+
+    reference = HashLife()
+    reference.set_cells(r_pentomino_cells)
+    reference.run(200)
+    assert sorted(small.cells()) == sorted(reference.cells())
+
+# R-펜토미노는 1103 세대 뒤에 안정되지만, 그동안 내보낸 글라이더는 끝없이 멀어진다
+# 먼저 128x128 Grid에서 simulate를 128번 반복한 시간과 비교하고,
+# 그 다음 세대 수를 열 배씩 늘려 가며 HashLife의 시간을 잰다
+def baseline(generations):
+    grid = Grid(128, 128)
+    r_pentomino(grid, 64, 64)
+    life = HashLife.from_grid(grid)
+
+    start = time.perf_counter()
+    for _ in range(generations):
+        grid = simulate(grid)
+    simulate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    life.run(generations)
+    hashlife_time = time.perf_counter() - start
+
+    assert str(life.to_grid(128, 128)) == str(grid)
+    print(f'{generations} 세대: simulate {simulate_time:.3f}초, '
+          f'HashLife {hashlife_time:.3f}초')
+
+def benchmark(generations):
+    life = HashLife()
+    life.set_cells([(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)])
+    start = time.perf_counter()
+    life.run(generations)
+    jump_time = time.perf_counter() - start
+    print(f'{generations:,} 세대: HashLife {jump_time:.3f}초, '
+          f'살아 있는 셀 {life.root.population}개, '
+          f'노드 {len(life.nodes):,}개, 결과 캐시 {len(life.results):,}개')
+
+def main():
+    baseline(128)
+    for generations in (1_000, 10_000, 100_000, 1_000_000):
+        benchmark(generations)
+
+if __name__ == '__main__':
+    main()
+
+# 128 세대: simulate 4.505초, HashLife 0.080초
+# 1,000 세대: HashLife 0.906초, 살아 있는 셀 156개, 노드 49,465개, 결과 캐시 49,366개
+# 10,000 세대: HashLife 0.763초, 살아 있는 셀 116개, 노드 51,844개, 결과 캐시 51,768개
+# 100,000 세대: HashLife 0.861초, 살아 있는 셀 116개, 노드 52,424개, 결과 캐시 52,339개
+# 1,000,000 세대: HashLife 0.972초, 살아 있는 셀 116개, 노드 53,066개, 결과 캐시 52,967개
+
+# 패턴이 안정된 뒤에는 세대 수를 열 배로 늘려도 시간이 거의 늘지 않는다
+# 대신 노드 테이블과 결과 캐시가 메모리를 차지하므로 max_nodes와 max_results로 상한을 정해 두는 것이 좋다
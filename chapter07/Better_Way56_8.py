@@ -0,0 +1,237 @@
+# 그리드와 여러 세대를 출력할 때는 문자열을 한 번에 join하라
+
+# Grid.__str__은 셀마다 output += cell 로 문자열을 이어 붙인다
+# ColumnPrinter.__str__은 (행, 열) 쌍마다 data.splitlines()를 다시 호출한다
+# 그래서 보드 높이 x 세대 수에 대해 제곱으로 느려지고, 500x500 보드 50세대를 출력하는 데 시뮬레이션보다 오래 걸린다
+
+# 해결 방법은 간단하다
+# - 행마다 ''.join으로 한 번에 문자열을 만든다
+# - 각 열(세대)은 추가할 때 딱 한 번만 splitlines 한다
+# - 출력을 큰 문자열 하나로 만들지 않고 텍스트 스트림에 행 단위로 바로 쓴다
+# 터미널 애니메이션처럼 같은 화면을 계속 다시 그려야 한다면 바뀐 행만 다시 쓰면 된다
+
+import io
+import sys
+import time
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+def simulate(grid):
+    next_grid = Grid(grid.height, grid.width)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, next_grid.set)
+    return next_grid
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+def render_grid(grid):
+    return ''.join([''.join(row) + '\n' for row in grid.rows])
+
+# ColumnPrinter와 같은 결과를 만들지만 각 열을 append할 때 한 번만 나눈다
+class StreamingColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data.splitlines())
+
+    def write(self, stream):
+        if not self.columns:
+            return
+        separator = ' | '
+        header = []
+        for i, lines in enumerate(self.columns):
+            padding = ' ' * (len(lines[0]) // 2)
+            header.append(padding + str(i) + padding)
+        stream.write(separator.join(header))
+
+        row_count = max(len(lines) for lines in self.columns)
+        for j in range(row_count):
+            stream.write('\n')
+            stream.write(separator.join(
+                [lines[j] for lines in self.columns]))
+
+    def __str__(self):
+        output = io.StringIO()
+        self.write(output)
+        return output.getvalue()
+
+# 터미널에 세대를 애니메이션으로 보여줄 때 직전 프레임과 달라진 행만 다시 쓴다
+# ANSI 이스케이프 시퀀스로 커서를 해당 행의 맨 앞으로 옮긴 뒤 그 행만 덮어쓴다
+class TerminalRenderer:
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.previous = None
+
+    def render(self, grid):
+        lines = [''.join(row) for row in grid.rows]
+        chunks = []
+        if self.previous is None or len(self.previous) != len(lines):
+            chunks.append('\x1b[2J')  # 화면 전체를 지운다
+            changed = range(len(lines))
+        else:
+            changed = [
+                y for y, (old, new) in enumerate(zip(self.previous, lines))
+                if old != new]
+        for y in changed:
+            chunks.append(f'\x1b[{y + 1};1H{lines[y]}')
+        self.stream.write(''.join(chunks))
+        self.stream.flush()
+        self.previous = lines
+        return len(changed)
+
+grid = Grid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = StreamingColumnPrinter()
+old_columns = ColumnPrinter()
+for i in range(5):
+    assert render_grid(grid) == str(grid)
+    columns.append(render_grid(grid))
+    old_columns.append(str(grid))
+    grid = simulate(grid)
+
+columns.write(sys.stdout)
+print()
+assert str(columns) == str(old_columns)
+
+# 첫 프레임 이후로는 글라이더가 지나가는 행만 다시 쓴다
+screen = io.StringIO()
+renderer = TerminalRenderer(screen)
+for i in range(5):
+    written = renderer.render(grid)
+    print(f'{i} 번째 프레임: {written}개 행을 다시 씀')
+    grid = simulate(grid)
+
+# 렌더링 시간만 재기 위해 시뮬레이션 대신 보드를 한 칸씩 회전시켜서 50개 세대를 만든다
+def make_frames(size, count):
+    grid = Grid(size, size)
+    for y in range(size):
+        for x in range(size):
+            if (x * 7 + y * 13) % 5 < 2:
+                grid.set(y, x, ALIVE)
+    frames = []
+    for i in range(count):
+        frame = Grid(size, size)
+        frame.rows = [row[i:] + row[:i] for row in grid.rows]
+        frames.append(frame)
+    return frames
+
+def benchmark(size, count):
+    frames = make_frames(size, count)
+
+    start = time.perf_counter()
+    old_columns = ColumnPrinter()
+    for frame in frames:
+        old_columns.append(str(frame))
+    old_output = str(old_columns)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = StreamingColumnPrinter()
+    for frame in frames:
+        columns.append(render_grid(frame))
+    output = io.StringIO()
+    columns.write(output)
+    new_time = time.perf_counter() - start
+
+    assert output.getvalue() == old_output
+    print(f'{size}x{size} {count}세대: ColumnPrinter {old_time:.3f}초, '
+          f'StreamingColumnPrinter {new_time:.3f}초')
+
+def main():
+    benchmark(100, 50)
+    benchmark(500, 50)
+
+if __name__ == '__main__':
+    main()
+
+# 100x100 50세대: ColumnPrinter 0.130초, StreamingColumnPrinter 0.006초
+# 500x500 50세대: ColumnPrinter 9.837초, StreamingColumnPrinter 0.128초
@@ -0,0 +1,341 @@
+# 파이프라인 큐에는 셀 하나가 아니라 셀 묶음(배치)을 넣어라
+
+# Better_Way58_2의 simulate_phased_pipeline은 셀마다 (y, x, state, get) 튜플 하나를 큐에 넣는다
+# 셀 하나가 in_queue -> logic_queue -> out_queue를 지날 때마다
+# Queue.put/get, 조건 변수 알림, task_done 호출 비용을 매번 치러야 한다
+
+# 큐 아이템 하나에 셀 여러 개를 담으면 이 비용을 배치 크기만큼 나눠 낼 수 있다
+# 배치 안에서 예외가 발생해도 셀마다 결과를 따로 담아 두면 어느 (y, x)에서 실패했는지 그대로 알 수 있다
+
+from queue import Queue
+from threading import Thread
+from threading import Lock
+import time
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue, **kwargs):
+        super().__init__(**kwargs)
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+ALIVE = '*'
+EMPTY = '-'
+
+class SimulationError(Exception):
+    pass
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+class LockingGrid(Grid):
+    def __init__(self, height, width):
+        super().__init__(height, width)
+        self.lock = Lock()
+
+    def __str__(self):
+        with self.lock:
+            return super().__str__()
+
+    def get(self, y, x):
+        with self.lock:
+            return super().get(y, x)
+
+    def set(self, y, x, state):
+        with self.lock:
+            return super().set(y, x, state)
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    # 여기서 블러킹 I/O를 수행한다
+    #data = my_socket.recv(100)
+    return count
+
+def count_neighbors_thread(item):
+    y, x, state, get = item
+    try:
+        neighbors = count_neighbors(y, x, get)
+    except Exception as e:
+        neighbors = e
+    return (y, x, state, neighbors)
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+
+    # 여기서 블러킹 I/O를 수행한다
+    #data = my_socket.recv(100)
+    return state
+
+def game_logic_thread(item):
+    y, x, state, neighbors = item
+    try:
+        next_state = game_logic(state, neighbors)
+    except Exception as e:
+        next_state = e
+    return (y, x, next_state)
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+def simulate_phased_pipeline(
+        grid, in_queue, logic_queue, out_queue):
+    for y in range(grid.height):
+        for x in range(grid.width):
+            state = grid.get(y, x)
+            item = (y, x, state, grid.get)
+            in_queue.put(item)  # 팬아웃
+
+    in_queue.join()
+    logic_queue.join()  # 파이프라인을 순서대로 실행한다
+    out_queue.close()
+
+    next_grid = LockingGrid(grid.height, grid.width)
+    for item in out_queue:  # 팬인
+        y, x, next_state = item
+        if isinstance(next_state, Exception):
+            raise SimulationError(y, x) from next_state
+        next_grid.set(y, x, next_state)
+    return next_grid
+
+# 배치를 처리하는 스레드 함수는 셀 단위 함수를 배치 안의 셀마다 호출할 뿐이다
+# 예외는 셀 단위 함수 안에서 잡히므로 한 셀이 실패해도 같은 배치의 다른 셀은 계속 처리된다
+def count_neighbors_batch_thread(batch):
+    return [count_neighbors_thread(item) for item in batch]
+
+# 이웃 수를 세다가 실패한 셀은 그 예외를 그대로 다음 단계로 넘겨서 원래 원인이 남게 한다
+def game_logic_batch_thread(batch):
+    results = []
+    for item in batch:
+        y, x, state, neighbors = item
+        if isinstance(neighbors, Exception):
+            results.append((y, x, neighbors))
+        else:
+            results.append(game_logic_thread(item))
+    return results
+
+# batch_size는 호출할 때마다 바꿀 수 있다
+# 작업자 스레드는 배치 크기를 모르고 받은 리스트를 처리할 뿐이므로, 세대마다 다른 값을 넘겨도 된다
+def simulate_phased_pipeline_batched(
+        grid, in_queue, logic_queue, out_queue, batch_size):
+    batch = []
+    for y in range(grid.height):
+        for x in range(grid.width):
+            state = grid.get(y, x)
+            batch.append((y, x, state, grid.get))
+            if len(batch) == batch_size:
+                in_queue.put(batch)  # 팬아웃
+                batch = []
+    if batch:
+        in_queue.put(batch)
+
+    in_queue.join()
+    logic_queue.join()  # 파이프라인을 순서대로 실행한다
+    out_queue.close()
+
+    next_grid = LockingGrid(grid.height, grid.width)
+    error = None
+    for batch in out_queue:  # 팬인
+        for y, x, next_state in batch:
+            if isinstance(next_state, Exception):
+                # 큐를 끝까지 비워야 다음 세대에 이전 결과가 섞이지 않는다
+                if error is None:
+                    error = SimulationError(y, x)
+                    error.__cause__ = next_state
+                continue
+            next_grid.set(y, x, next_state)
+    if error is not None:
+        raise error
+    return next_grid
+
+def start_pipeline(count_func, logic_func, count=5):
+    in_queue = ClosableQueue()
+    logic_queue = ClosableQueue()
+    out_queue = ClosableQueue()
+    threads = []
+    for _ in range(count):
+        thread = StoppableWorker(count_func, in_queue, logic_queue)
+        thread.start()
+        threads.append(thread)
+    for _ in range(count):
+        thread = StoppableWorker(logic_func, logic_queue, out_queue)
+        thread.start()
+        threads.append(thread)
+    return in_queue, logic_queue, out_queue, threads
+
+def stop_pipeline(in_queue, logic_queue, out_queue, threads):
+    for _ in range(len(threads) // 2):
+        in_queue.close()
+    for _ in range(len(threads) // 2):
+        logic_queue.close()
+    for thread in threads:
+        thread.join()
+
+# 스레드를 미리 시작한다
+in_queue, logic_queue, out_queue, threads = start_pipeline(
+    count_neighbors_batch_thread, game_logic_batch_thread)
+
+grid = Grid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+for i in range(5):
+    columns.append(str(grid))
+    grid = simulate_phased_pipeline_batched(
+        grid, in_queue, logic_queue, out_queue, batch_size=4 + i)
+
+print(columns)
+
+# 배치 중간의 셀 하나에서 예외가 나도 SimulationError가 정확한 좌표를 알려준다
+# (-1, 9)는 (0, 8) 셀의 북동쪽 이웃을 읽을 때만 사용되는 좌표다
+class BrokenGrid(Grid):
+    def get(self, y, x):
+        if (y, x) == (-1, 9):
+            raise OSError('셀을 읽을 수 없음')
+        return super().get(y, x)
+
+try:
+    simulate_phased_pipeline_batched(
+        BrokenGrid(5, 9), in_queue, logic_queue, out_queue, batch_size=16)
+except SimulationError as e:
+    print('예상대로 오류 발생:', e.args, repr(e.__cause__))
+    assert e.args == (0, 8)
+else:
+    assert False
+
+stop_pipeline(in_queue, logic_queue, out_queue, threads)
+
+def make_grid(height, width):
+    grid = LockingGrid(height, width)
+    for y in range(height):
+        for x in range(width):
+            if (x * 7 + y * 13) % 5 < 2:
+                grid.set(y, x, ALIVE)
+    return grid
+
+def benchmark(size, generations):
+    queues = start_pipeline(count_neighbors_thread, game_logic_thread)
+    grid = make_grid(size, size)
+    start = time.perf_counter()
+    for _ in range(generations):
+        grid = simulate_phased_pipeline(grid, *queues[:3])
+    elapsed = time.perf_counter() - start
+    stop_pipeline(*queues)
+    expected = str(grid)
+    print(f'셀 단위: 세대당 {elapsed / generations:.3f}초')
+
+    queues = start_pipeline(
+        count_neighbors_batch_thread, game_logic_batch_thread)
+    for batch_size in (1, 10, 100, 1000):
+        grid = make_grid(size, size)
+        start = time.perf_counter()
+        for _ in range(generations):
+            grid = simulate_phased_pipeline_batched(
+                grid, *queues[:3], batch_size)
+        elapsed = time.perf_counter() - start
+        assert str(grid) == expected
+        print(f'배치 {batch_size}개: 세대당 {elapsed / generations:.3f}초')
+    stop_pipeline(*queues)
+
+def main():
+    benchmark(200, 3)
+
+if __name__ == '__main__':
+    main()
+
+# 셀 단위: 세대당 1.264초
+# 배치 1개: 세대당 1.577초
+# 배치 10개: 세대당 0.830초
+# 배치 100개: 세대당 0.774초
+# 배치 1000개: 세대당 0.757초
+
+# 배치 크기가 1이면 리스트를 만드는 비용만 더해져 오히려 느리다
+# 배치를 10개 정도로만 묶어도 큐 부가 비용 대부분이 사라진다
+# 배치가 너무 크면 스레드 수보다 큐 아이템이 적어져서 블로킹 I/O를 병렬로 처리하지 못하므로 주의해야 한다
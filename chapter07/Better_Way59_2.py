@@ -0,0 +1,269 @@
+# ThreadPoolExecutor에 셀 하나가 아니라 행 묶음(밴드)을 작업 단위로 제출하라
+
+# Better_Way59의 simulate_pool은 셀마다 future를 하나씩 제출한다
+# 1000x1000 그리드라면 한 세대에 future가 백만 개 만들어지고, LockingGrid.set의 락도 백만 번 획득한다
+# 셀마다 드는 계산은 아주 작으므로 시간 대부분이 future와 락을 관리하는 데 쓰인다
+
+# 작업 단위를 행 묶음이나 직사각형 블록으로 키우면 이런 부가 비용을 블록 개수만큼으로 줄일 수 있다
+# 각 작업은 블록 전체를 자기만의 버퍼에 계산한 뒤, 다음 그리드에 락을 한 번만 잡고 한꺼번에 쓴다
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import time
+
+ALIVE = '*'
+EMPTY = '-'
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+class LockingGrid(Grid):
+    def __init__(self, height, width):
+        super().__init__(height, width)
+        self.lock = Lock()
+
+    def __str__(self):
+        with self.lock:
+            return super().__str__()
+
+    def get(self, y, x):
+        with self.lock:
+            return super().get(y, x)
+
+    def set(self, y, x, state):
+        with self.lock:
+            return super().set(y, x, state)
+
+    # (top, left)부터 시작하는 직사각형 영역을 락 한 번으로 덮어쓴다
+    def set_block(self, top, left, block):
+        with self.lock:
+            for y, row in enumerate(block, top):
+                self.rows[y][left:left + len(row)] = row
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    # 여기서 블러킹 I/O를 수행한다
+    #data = my_socket.recv(100)
+    return count
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+
+    # 여기서 블러킹 I/O를 수행한다
+    #data = my_socket.recv(100)
+    return state
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+def simulate_pool(pool, grid):
+    next_grid = LockingGrid(grid.height, grid.width)
+    futures = []
+    for y in range(grid.height):
+        for x in range(grid.width):
+            args = (y, x, grid.get, next_grid.set)
+            future = pool.submit(step_cell, *args)  # 팬아웃
+            futures.append(future)
+
+    for future in futures:
+        future.result()  # 팬인
+
+    return next_grid
+
+# 블록 하나를 계산하는 작업
+# step_cell이 셀마다 호출하던 set 대신 지역 버퍼의 set을 넘기고, 다 계산한 버퍼를 set_block으로 한 번에 쓴다
+def step_block(top, bottom, left, right, get, set_block):
+    block = [[EMPTY] * (right - left) for _ in range(bottom - top)]
+
+    def set_local(y, x, state):
+        block[y - top][x - left] = state
+
+    for y in range(top, bottom):
+        for x in range(left, right):
+            step_cell(y, x, get, set_local)
+
+    set_block(top, left, block)
+
+def split(length, size):
+    return [(start, min(start + size, length))
+            for start in range(0, length, size)]
+
+# block_rows x block_cols 크기의 블록마다 future를 하나씩 제출한다
+# block_cols를 지정하지 않으면 행 전체를 폭으로 하는 밴드가 작업 단위가 된다
+def simulate_pool_blocks(pool, grid, block_rows, block_cols=None):
+    if block_cols is None:
+        block_cols = grid.width
+    next_grid = LockingGrid(grid.height, grid.width)
+    futures = []
+    for top, bottom in split(grid.height, block_rows):
+        for left, right in split(grid.width, block_cols):
+            args = (top, bottom, left, right, grid.get, next_grid.set_block)
+            future = pool.submit(step_block, *args)  # 팬아웃
+            futures.append(future)
+
+    for future in futures:
+        future.result()  # 팬인
+
+    return next_grid
+
+# 후보 밴드 높이마다 한 세대씩 실제로 계산해 보고 가장 빨랐던 값을 고른다
+# 밴드가 너무 작으면 future 부가 비용이 커지고, 너무 크면 작업자 수보다 작업이 적어져 I/O 병렬성을 잃는다
+def tune_block_rows(pool, grid, candidates=None):
+    if candidates is None:
+        candidates = []
+        size = 1
+        while size < grid.height:
+            candidates.append(size)
+            size *= 4
+        candidates.append(grid.height)
+
+    best_rows = None
+    best_time = None
+    for block_rows in candidates:
+        start = time.perf_counter()
+        simulate_pool_blocks(pool, grid, block_rows)
+        elapsed = time.perf_counter() - start
+        if best_time is None or elapsed < best_time:
+            best_rows = block_rows
+            best_time = elapsed
+    return best_rows
+
+grid = LockingGrid(5, 9)
+grid.set(0, 3, ALIVE)
+grid.set(1, 4, ALIVE)
+grid.set(2, 2, ALIVE)
+grid.set(2, 3, ALIVE)
+grid.set(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+with ThreadPoolExecutor(max_workers=10) as pool:
+    for i in range(5):
+        columns.append(str(grid))
+        grid = simulate_pool_blocks(pool, grid, block_rows=2, block_cols=4)
+
+print(columns)
+
+# 블록 크기와 관계없이 셀 단위 simulate_pool과 결과가 같은지 확인한다
+def make_grid(height, width):
+    grid = LockingGrid(height, width)
+    for y in range(height):
+        for x in range(width):
+            if (x * 7 + y * 13) % 5 < 2:
+                grid.set(y, x, ALIVE)
+    return grid
+
+with ThreadPoolExecutor(max_workers=10) as pool:
+    expected = simulate_pool(pool, make_grid(20, 30))
+    for block_rows, block_cols in [(1, None), (3, 7), (20, 30), (64, 64)]:
+        actual = simulate_pool_blocks(
+            pool, make_grid(20, 30), block_rows, block_cols)
+        assert str(actual) == str(expected), (block_rows, block_cols)
+
+def benchmark(size, generations):
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        grid = make_grid(size, size)
+        start = time.perf_counter()
+        for _ in range(generations):
+            grid = simulate_pool(pool, grid)
+        elapsed = time.perf_counter() - start
+        futures = size * size * generations
+        print(f'셀 단위: 세대당 {elapsed / generations:.3f}초, '
+              f'{generations / elapsed:.2f} 세대/초, '
+              f'{futures / elapsed:,.0f} future/초')
+
+        block_rows = tune_block_rows(pool, make_grid(size, size))
+        for rows in sorted({1, 16, block_rows}):
+            grid = make_grid(size, size)
+            start = time.perf_counter()
+            for _ in range(generations):
+                grid = simulate_pool_blocks(pool, grid, rows)
+            elapsed = time.perf_counter() - start
+            futures = len(split(size, rows)) * generations
+            tuned = ' (자동 선택)' if rows == block_rows else ''
+            print(f'밴드 {rows}행{tuned}: 세대당 {elapsed / generations:.3f}초, '
+                  f'{generations / elapsed:.2f} 세대/초, '
+                  f'{futures / elapsed:,.0f} future/초')
+
+def main():
+    benchmark(300, 5)
+
+if __name__ == '__main__':
+    main()
+
+# 셀 단위: 세대당 3.814초, 0.26 세대/초, 23,598 future/초
+# 밴드 1행: 세대당 1.364초, 0.73 세대/초, 220 future/초
+# 밴드 16행: 세대당 0.993초, 1.01 세대/초, 19 future/초
+# 밴드 300행 (자동 선택): 세대당 0.840초, 1.19 세대/초, 1 future/초
+
+# 이 예제의 game_logic은 I/O 없이 계산만 하므로 블록이 클수록 빠르고, 자동 선택도 그리드 전체를 고른다
+# 셀마다 블로킹 I/O가 있다면 블록 안의 셀은 순서대로 처리되므로 작업자 수보다 블록이 많아야 병렬성을 얻는다
+# 이런 경우에도 tune_block_rows는 실제로 재 본 시간을 기준으로 적당한 크기를 고른다
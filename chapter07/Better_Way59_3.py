@@ -0,0 +1,434 @@
+# 이전 세대는 읽기 전용 스냅숏으로, 다음 세대는 쓰기 버퍼로 나눠서 락 경합을 줄여라
+
+# Better_Way57~59의 LockingGrid는 get과 set을 호출할 때마다 락 하나를 잡는다
+# 그래서 이전 세대를 읽는 스레드들이 다음 세대에 쓰는 스레드들과 같은 락을 두고 줄을 선다
+# 하지만 한 세대를 계산하는 동안 이전 세대는 절대 바뀌지 않으므로 읽을 때 락을 잡을 이유가 없다
+
+# DoubleBufferedGrid는 버퍼 두 개를 번갈아 사용한다
+# - 읽기 버퍼(front): 이전 세대. 아무도 쓰지 않으므로 락 없이 읽는다
+# - 쓰기 버퍼(back): 다음 세대. 행 묶음(stripe)마다 락을 따로 두어 서로 다른 행에 쓰는 스레드끼리는 기다리지 않는다
+# 세대 경계(팬인이 끝난 뒤)에 swap을 호출해서 두 버퍼를 바꾼다
+# step_cell은 get과 set만 사용하므로 고칠 필요가 없다
+
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Thread
+from threading import Lock
+import time
+
+class ClosableQueue(Queue):
+    SENTINEL = object()
+
+    def close(self):
+        self.put(self.SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            try:
+                if item is self.SENTINEL:
+                    return   # 스레드를 종료시킨다
+                yield item
+            finally:
+                self.task_done()
+
+class StoppableWorker(Thread):
+    def __init__(self, func, in_queue, out_queue, **kwargs):
+        super().__init__(**kwargs)
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+
+    def run(self):
+        for item in self.in_queue:
+            result = self.func(item)
+            self.out_queue.put(result)
+
+ALIVE = '*'
+EMPTY = '-'
+
+class SimulationError(Exception):
+    pass
+
+class Grid:
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        for _ in range(self.height):
+            self.rows.append([EMPTY] * self.width)
+
+    def get(self, y, x):
+        return self.rows[y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        self.rows[y % self.height][x % self.width] = state
+
+    def __str__(self):
+        output = ''
+        for row in self.rows:
+            for cell in row:
+                output += cell
+            output += '\n'
+        return output
+
+class LockingGrid(Grid):
+    def __init__(self, height, width):
+        super().__init__(height, width)
+        self.lock = Lock()
+
+    def __str__(self):
+        with self.lock:
+            return super().__str__()
+
+    def get(self, y, x):
+        with self.lock:
+            return super().get(y, x)
+
+    def set(self, y, x, state):
+        with self.lock:
+            return super().set(y, x, state)
+
+class DoubleBufferedGrid:
+    def __init__(self, height, width, stripe_rows=1):
+        self.height = height
+        self.width = width
+        self.stripe_rows = stripe_rows
+        front = [[EMPTY] * width for _ in range(height)]
+        back = [[EMPTY] * width for _ in range(height)]
+        # 두 버퍼를 튜플 하나에 담아 두면 swap이 속성 대입 한 번으로 끝나므로 원자적이다
+        self.buffers = (front, back)
+        stripes = (height + stripe_rows - 1) // stripe_rows
+        self.locks = [Lock() for _ in range(stripes)]
+
+    def get(self, y, x):
+        return self.buffers[0][y % self.height][x % self.width]
+
+    def set(self, y, x, state):
+        y %= self.height
+        with self.locks[y // self.stripe_rows]:
+            self.buffers[1][y][x % self.width] = state
+
+    # 다음 세대 계산이 모두 끝난 뒤(팬인 이후)에만 호출해야 한다
+    def swap(self):
+        front, back = self.buffers
+        self.buffers = (back, front)
+
+    # 데모 코드처럼 첫 세대를 구성할 때는 읽기 버퍼에 직접 쓴다
+    def set_initial(self, y, x, state):
+        self.buffers[0][y % self.height][x % self.width] = state
+
+    def __str__(self):
+        return ''.join(''.join(row) + '\n' for row in self.buffers[0])
+
+def count_neighbors(y, x, get):
+    n_ = get(y - 1, x + 0) # 북(N)
+    ne = get(y - 1, x + 1) # 북동(NE)
+    e_ = get(y + 0, x + 1) # 동(E)
+    se = get(y + 1, x + 1) # 남동(SE)
+    s_ = get(y + 1, x + 0) # 남(S)
+    sw = get(y + 1, x - 1) # 남서(SW)
+    w_ = get(y + 0, x - 1) # 서(W)
+    nw = get(y - 1, x - 1) # 북서(NW)
+    neighbor_states = [n_, ne, e_, se, s_, sw, w_, nw]
+    count = 0
+    for state in neighbor_states:
+        if state == ALIVE:
+            count += 1
+    # 여기서 블러킹 I/O를 수행한다
+    #data = my_socket.recv(100)
+    return count
+
+def count_neighbors_thread(item):
+    y, x, state, get = item
+    try:
+        neighbors = count_neighbors(y, x, get)
+    except Exception as e:
+        neighbors = e
+    return (y, x, state, neighbors)
+
+def game_logic(state, neighbors):
+    if state == ALIVE:
+        if neighbors < 2:
+            return EMPTY # 살아 있는 이웃이 너무 적음: 죽음
+        elif neighbors > 3:
+            return EMPTY # 살아 있는 이웃이 너무 많음: 죽음
+    else:
+        if neighbors == 3:
+            return ALIVE # 다시 생성됨
+
+    # 여기서 블러킹 I/O를 수행한다
+    #data = my_socket.recv(100)
+    return state
+
+def game_logic_thread(item):
+    y, x, state, neighbors = item
+    try:
+        next_state = game_logic(state, neighbors)
+    except Exception as e:
+        next_state = e
+    return (y, x, next_state)
+
+def step_cell(y, x, get, set):
+    state = get(y, x)
+    neighbors = count_neighbors(y, x, get)
+    next_state = game_logic(state, neighbors)
+    set(y, x, next_state)
+
+class ColumnPrinter:
+    def __init__(self):
+        self.columns = []
+
+    def append(self, data):
+        self.columns.append(data)
+
+    def __str__(self):
+        row_count = 1
+        for data in self.columns:
+            row_count = max(
+                row_count, len(data.splitlines()) + 1)
+
+        rows = [''] * row_count
+        for j in range(row_count):
+            for i, data in enumerate(self.columns):
+                line = data.splitlines()[max(0, j - 1)]
+                if j == 0:
+                    padding = ' ' * (len(line) // 2)
+                    rows[j] += padding + str(i) + padding
+                else:
+                    rows[j] += line
+
+                if (i + 1) < len(self.columns):
+                    rows[j] += ' | '
+
+        return '\n'.join(rows)
+
+# 아래는 Better_Way57~59의 시뮬레이터를 그대로 옮긴 것이다
+def simulate_threaded(grid):
+    next_grid = LockingGrid(grid.height, grid.width)
+
+    threads = []
+    for y in range(grid.height):
+        for x in range(grid.width):
+            args = (y, x, grid.get, next_grid.set)
+            thread = Thread(target=step_cell, args=args)
+            thread.start()  # 팬아웃
+            threads.append(thread)
+
+    for thread in threads:
+        thread.join()  # 팬인
+
+    return next_grid
+
+def simulate_pool(pool, grid):
+    next_grid = LockingGrid(grid.height, grid.width)
+    futures = []
+    for y in range(grid.height):
+        for x in range(grid.width):
+            args = (y, x, grid.get, next_grid.set)
+            future = pool.submit(step_cell, *args)  # 팬아웃
+            futures.append(future)
+
+    for future in futures:
+        future.result()  # 팬인
+
+    return next_grid
+
+def simulate_phased_pipeline(
+        grid, in_queue, logic_queue, out_queue):
+    for y in range(grid.height):
+        for x in range(grid.width):
+            state = grid.get(y, x)
+            item = (y, x, state, grid.get)
+            in_queue.put(item)  # 팬아웃
+
+    in_queue.join()
+    logic_queue.join()  # 파이프라인을 순서대로 실행한다
+    out_queue.close()
+
+    next_grid = LockingGrid(grid.height, grid.width)
+    for item in out_queue:  # 팬인
+        y, x, next_state = item
+        if isinstance(next_state, Exception):
+            raise SimulationError(y, x) from next_state
+        next_grid.set(y, x, next_state)
+    return next_grid
+
+# DoubleBufferedGrid용 시뮬레이터는 새 그리드를 만드는 대신 같은 그리드의 get과 set을 넘기고
+# 팬인이 끝나면 swap을 호출한다. 나머지는 위의 코드와 똑같다
+def simulate_threaded_buffered(grid):
+    threads = []
+    for y in range(grid.height):
+        for x in range(grid.width):
+            args = (y, x, grid.get, grid.set)
+            thread = Thread(target=step_cell, args=args)
+            thread.start()  # 팬아웃
+            threads.append(thread)
+
+    for thread in threads:
+        thread.join()  # 팬인
+
+    grid.swap()
+    return grid
+
+def simulate_pool_buffered(pool, grid):
+    futures = []
+    for y in range(grid.height):
+        for x in range(grid.width):
+            args = (y, x, grid.get, grid.set)
+            future = pool.submit(step_cell, *args)  # 팬아웃
+            futures.append(future)
+
+    for future in futures:
+        future.result()  # 팬인
+
+    grid.swap()
+    return grid
+
+def simulate_phased_pipeline_buffered(
+        grid, in_queue, logic_queue, out_queue):
+    for y in range(grid.height):
+        for x in range(grid.width):
+            state = grid.get(y, x)
+            item = (y, x, state, grid.get)
+            in_queue.put(item)  # 팬아웃
+
+    in_queue.join()
+    logic_queue.join()  # 파이프라인을 순서대로 실행한다
+    out_queue.close()
+
+    error = None
+    for item in out_queue:  # 팬인
+        y, x, next_state = item
+        if isinstance(next_state, Exception):
+            # 큐를 끝까지 비우고, 쓰기 버퍼를 버린 채로(swap 없이) 오류를 알린다
+            if error is None:
+                error = SimulationError(y, x)
+                error.__cause__ = next_state
+            continue
+        grid.set(y, x, next_state)
+    if error is not None:
+        raise error
+
+    grid.swap()
+    return grid
+
+def start_pipeline(count=5):
+    in_queue = ClosableQueue()
+    logic_queue = ClosableQueue()
+    out_queue = ClosableQueue()
+    threads = []
+    for _ in range(count):
+        thread = StoppableWorker(
+            count_neighbors_thread, in_queue, logic_queue)
+        thread.start()
+        threads.append(thread)
+    for _ in range(count):
+        thread = StoppableWorker(
+            game_logic_thread, logic_queue, out_queue)
+        thread.start()
+        threads.append(thread)
+    return in_queue, logic_queue, out_queue, threads
+
+def stop_pipeline(in_queue, logic_queue, out_queue, threads):
+    for _ in range(len(threads) // 2):
+        in_queue.close()
+    for _ in range(len(threads) // 2):
+        logic_queue.close()
+    for thread in threads:
+        thread.join()
+
+grid = DoubleBufferedGrid(5, 9)
+grid.set_initial(0, 3, ALIVE)
+grid.set_initial(1, 4, ALIVE)
+grid.set_initial(2, 2, ALIVE)
+grid.set_initial(2, 3, ALIVE)
+grid.set_initial(2, 4, ALIVE)
+
+columns = ColumnPrinter()
+with ThreadPoolExecutor(max_workers=10) as pool:
+    for i in range(5):
+        columns.append(str(grid))
+        grid = simulate_pool_buffered(pool, grid)
+
+print(columns)
+
+def make_grid(grid):
+    for y in range(grid.height):
+        for x in range(grid.width):
+            if (x * 7 + y * 13) % 5 < 2:
+                if isinstance(grid, DoubleBufferedGrid):
+                    grid.set_initial(y, x, ALIVE)
+                else:
+                    grid.set(y, x, ALIVE)
+    return grid
+
+# 세 가지 시뮬레이터 모두 LockingGrid를 쓸 때와 결과가 같은지 확인한다
+expected = make_grid(LockingGrid(12, 15))
+for _ in range(3):
+    expected = simulate_threaded(expected)
+
+actual = make_grid(DoubleBufferedGrid(12, 15, stripe_rows=4))
+for _ in range(3):
+    actual = simulate_threaded_buffered(actual)
+assert str(actual) == str(expected)
+
+actual = make_grid(DoubleBufferedGrid(12, 15))
+with ThreadPoolExecutor(max_workers=10) as pool:
+    for _ in range(3):
+        actual = simulate_pool_buffered(pool, actual)
+assert str(actual) == str(expected)
+
+queues = start_pipeline()
+actual = make_grid(DoubleBufferedGrid(12, 15))
+for _ in range(3):
+    actual = simulate_phased_pipeline_buffered(actual, *queues[:3])
+stop_pipeline(*queues)
+assert str(actual) == str(expected)
+
+def benchmark(size, generations):
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        grid = make_grid(LockingGrid(size, size))
+        start = time.perf_counter()
+        for _ in range(generations):
+            grid = simulate_pool(pool, grid)
+        locking_time = time.perf_counter() - start
+        expected = str(grid)
+
+        grid = make_grid(DoubleBufferedGrid(size, size))
+        start = time.perf_counter()
+        for _ in range(generations):
+            grid = simulate_pool_buffered(pool, grid)
+        buffered_time = time.perf_counter() - start
+        assert str(grid) == expected
+    print(f'simulate_pool: LockingGrid {locking_time:.3f}초, '
+          f'DoubleBufferedGrid {buffered_time:.3f}초')
+
+    queues = start_pipeline()
+    grid = make_grid(LockingGrid(size, size))
+    start = time.perf_counter()
+    for _ in range(generations):
+        grid = simulate_phased_pipeline(grid, *queues[:3])
+    locking_time = time.perf_counter() - start
+
+    grid = make_grid(DoubleBufferedGrid(size, size))
+    start = time.perf_counter()
+    for _ in range(generations):
+        grid = simulate_phased_pipeline_buffered(grid, *queues[:3])
+    buffered_time = time.perf_counter() - start
+    stop_pipeline(*queues)
+    assert str(grid) == expected
+    print(f'simulate_phased_pipeline: LockingGrid {locking_time:.3f}초, '
+          f'DoubleBufferedGrid {buffered_time:.3f}초')
+
+def main():
+    benchmark(100, 5)
+
+if __name__ == '__main__':
+    main()
+
+# simulate_pool: LockingGrid 1.811초, DoubleBufferedGrid 1.364초
+# simulate_phased_pipeline: LockingGrid 1.768초, DoubleBufferedGrid 1.095초
+
+# 셀 하나를 계산할 때 get은 9번, set은 1번 호출되므로 읽기에서 락을 없애는 효과가 가장 크다
+# 또 세대마다 새 그리드를 만들지 않고 버퍼 두 개를 재사용하므로 메모리 할당도 줄어든다